@@ -6,12 +6,18 @@ This script starts a simple FastAPI server that wraps the SQL MCP tools.
 
 import os
 import sys
-import json
+import asyncio
+import inspect
+import importlib
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import orjson
 import uvicorn
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from dotenv import load_dotenv
 
 # Add project root to path
@@ -32,9 +38,14 @@ logger = logging.getLogger("SQL_MCP_Server")
 app = FastAPI(
     title="SQL MCP Server",
     version="0.4.0",
-    description="Provides tools to query SQL Server databases"
+    description="Provides tools to query SQL Server databases",
+    default_response_class=ORJSONResponse
 )
 
+# Compress large tool results (row sets, analysis output); level 1 keeps
+# the CPU cost low while still shrinking repetitive JSON substantially
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=1)
+
 # Enable CORS
 app.add_middleware(
     CORSMiddleware,
@@ -46,52 +57,116 @@ app.add_middleware(
 
 # Import base tools from the server script
 from sql_mcp_server import (
-    list_tables, get_table_schema, execute_select, find_foreign_keys,
-    _get_db_connection_blocking, _execute_query_blocking
+    list_tables, get_table_schema, execute_select, find_foreign_keys, refresh_metadata,
+    list_tables_with_schemas, clear_query_cache,
+    _get_db_connection_blocking, _execute_query_blocking, close_connection_pool,
+    ALLOWED_SCHEMAS, _POOL, _orjson_default
 )
 
-# Register available tools
-available_tools = {
-    "list_tables": list_tables,
-    "get_table_schema": get_table_schema,
-    "execute_select": execute_select,
-    "find_foreign_keys": find_foreign_keys
-}
+# Registered tools map name -> (callable, is_async). Whether a tool is a
+# coroutine function is decided once here so call_tool can run blocking
+# tools in a worker thread instead of stalling the event loop.
+available_tools = {}
+
+def register_tool(name, tool_function):
+    """Register a tool and record whether it must be awaited."""
+    available_tools[name] = (tool_function, inspect.iscoroutinefunction(tool_function))
 
-# Try to import and register additional tools
-try:
+register_tool("list_tables", list_tables)
+register_tool("get_table_schema", get_table_schema)
+register_tool("execute_select", execute_select)
+register_tool("find_foreign_keys", find_foreign_keys)
+register_tool("refresh_metadata", refresh_metadata)
+register_tool("list_tables_with_schemas", list_tables_with_schemas)
+register_tool("clear_query_cache", clear_query_cache)
+
+# Additional tools are registered by module and only imported on their
+# first call, so workers that never use them don't pay for loading them.
+# Until resolved, an entry holds (module_name, None) instead of a callable.
+LAZY_TOOL_MODULES = {
     # Analyze tools
-    from src.sqlmcp.tools.analyze_fixed import analyze_table_data, find_duplicate_records
-    available_tools["analyze_table_data"] = analyze_table_data
-    available_tools["find_duplicate_records"] = find_duplicate_records
-    logger.info("Registered analyze tools")
-except Exception as e:
-    logger.error(f"Failed to register analyze tools: {e}")
-
-try:
+    "src.sqlmcp.tools.analyze_fixed": ("analyze_table_data", "find_duplicate_records"),
     # Metadata tools
-    from src.sqlmcp.tools.metadata_fixed import get_database_info, list_stored_procedures, get_procedure_definition
-    available_tools["get_database_info"] = get_database_info
-    available_tools["list_stored_procedures"] = list_stored_procedures
-    available_tools["get_procedure_definition"] = get_procedure_definition
-    logger.info("Registered metadata tools")
-except Exception as e:
-    logger.error(f"Failed to register metadata tools: {e}")
-
-try:
+    "src.sqlmcp.tools.metadata_fixed": ("get_database_info", "list_stored_procedures", "get_procedure_definition"),
     # Schema extended tools
-    from src.sqlmcp.tools.schema_extended import list_schemas, get_sample_data, search_schema_objects, find_related_tables, get_query_examples
-    available_tools["list_schemas"] = list_schemas
-    available_tools["get_sample_data"] = get_sample_data
-    available_tools["search_schema_objects"] = search_schema_objects
-    available_tools["find_related_tables"] = find_related_tables
-    available_tools["get_query_examples"] = get_query_examples
-    logger.info("Registered schema extended tools")
-except Exception as e:
-    logger.error(f"Failed to register schema extended tools: {e}")
+    "src.sqlmcp.tools.schema_extended": ("list_schemas", "get_sample_data", "search_schema_objects", "find_related_tables", "get_query_examples"),
+}
+
+for module_name, tool_names in LAZY_TOOL_MODULES.items():
+    for name in tool_names:
+        available_tools[name] = (module_name, None)
+
+def load_tool_module(module_name):
+    """Wire a lazily registered module's database helpers and register its tools."""
+    module = importlib.import_module(module_name)
+    # Same injection tools_loader does, minus the FastMCP registration
+    module._get_db_connection_blocking = _get_db_connection_blocking
+    module._execute_query_blocking = _execute_query_blocking
+    if hasattr(module, "_acquire_connection_blocking"):
+        module._acquire_connection_blocking = _POOL.acquire
+    if hasattr(module, "ALLOWED_SCHEMAS"):
+        module.ALLOWED_SCHEMAS = ALLOWED_SCHEMAS
+    for name in LAZY_TOOL_MODULES[module_name]:
+        register_tool(name, getattr(module, name))
+
+def resolve_tool(tool_name):
+    """Return (callable, is_async) for a tool, importing its module on first use."""
+    tool_function, is_async = available_tools[tool_name]
+    if isinstance(tool_function, str):
+        load_tool_module(tool_function)
+        logger.info("Loaded tools from %s", tool_function)
+        tool_function, is_async = available_tools[tool_name]
+    return tool_function, is_async
+
+def preload_tools():
+    """Import all lazily registered tool modules concurrently."""
+    # The modules have no ordering dependencies on each other, so their
+    # imports (and any driver loading they trigger) can overlap
+    with ThreadPoolExecutor(max_workers=len(LAZY_TOOL_MODULES)) as executor:
+        futures = {
+            module_name: executor.submit(importlib.import_module, module_name)
+            for module_name in LAZY_TOOL_MODULES
+        }
+    for module_name, future in futures.items():
+        try:
+            future.result()
+            load_tool_module(module_name)
+            logger.info("Preloaded tools from %s", module_name)
+        except Exception as e:
+            # Leave the tools lazily registered; the error resurfaces on first call
+            logger.error("Failed to preload tools from %s: %s", module_name, e)
 
 # Basic advanced tools are not registered here due to complexity
 
+# Read-only catalog tools. Concurrent calls with identical parameters share
+# a single in-flight execution instead of each issuing the same query.
+COALESCED_TOOLS = frozenset({"list_tables", "get_table_schema", "find_foreign_keys", "list_tables_with_schemas"})
+_inflight_calls = {}
+
+async def coalesced_call(tool_name, tool_function, params):
+    """Run a coalescable tool, joining an identical call already in flight."""
+    key = (tool_name, orjson.dumps(params, option=orjson.OPT_SORT_KEYS))
+    task = _inflight_calls.get(key)
+    if task is None:
+        task = asyncio.ensure_future(tool_function(**params))
+        _inflight_calls[key] = task
+        task.add_done_callback(lambda _: _inflight_calls.pop(key, None))
+    else:
+        logger.debug("Joining in-flight call to %s", tool_name)
+    # Shield so one cancelled client doesn't cancel the call for the others
+    return await asyncio.shield(task)
+
+@app.on_event("startup")
+async def startup():
+    """Optionally import all tool modules up front"""
+    if os.environ.get("PRELOAD_TOOLS", "false").lower() in ("1", "true", "yes"):
+        await asyncio.to_thread(preload_tools)
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Close pooled database connections"""
+    await asyncio.to_thread(close_connection_pool)
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -107,26 +182,74 @@ async def call_tool(tool_name: str, request: Request):
         raise HTTPException(status_code=404, detail=f"Tool {tool_name} not found")
     
     # Get the tool function
-    tool_function = available_tools[tool_name]
+    try:
+        tool_function, is_async = resolve_tool(tool_name)
+    except Exception as e:
+        logger.error("Failed to load tool %s: %s", tool_name, e)
+        raise HTTPException(status_code=500, detail=f"Tool {tool_name} could not be loaded: {e}")
     
     # Parse request body
-    try:
-        if await request.body():
-            params = await request.json()
-        else:
+    body = await request.body()
+    if body:
+        try:
+            params = orjson.loads(body)
+        except orjson.JSONDecodeError:
             params = {}
-    except Exception:
+    else:
         params = {}
+    if not isinstance(params, dict):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON object")
     
     # Log the request
-    logger.info(f"Calling tool: {tool_name} with params: {json.dumps(params)}")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Calling tool: %s with params: %s", tool_name, orjson.dumps(params).decode())
+    
+    # Tools that expose an async generator as `.stream` can send their rows
+    # as NDJSON when the caller passes "stream": true, so large results are
+    # never held in memory as a whole
+    stream_function = getattr(tool_function, "stream", None)
+    if stream_function is not None and params.pop("stream", False):
+        # Pull and encode the first item before responding: validation,
+        # connection and serialization errors surface there and must become
+        # an error status, not a 200 with a truncated body
+        rows = None
+        try:
+            rows = stream_function(**params)
+            first_line = orjson.dumps(await rows.__anext__(), default=_orjson_default) + b"\n"
+        except StopAsyncIteration:
+            first_line = None
+        except Exception as e:
+            logger.error("Error streaming %s: %s", tool_name, e)
+            if rows is not None:
+                await rows.aclose()
+            raise HTTPException(status_code=500, detail=str(e))
+        
+        async def ndjson_rows():
+            try:
+                if first_line is None:
+                    return
+                yield first_line
+                async for row in rows:
+                    yield orjson.dumps(row, default=_orjson_default) + b"\n"
+            except Exception as e:
+                logger.error("Error streaming %s: %s", tool_name, e)
+                raise
+            finally:
+                # Releases the stream's connection if the client went away
+                await rows.aclose()
+        return StreamingResponse(ndjson_rows(), media_type="application/x-ndjson")
     
     # Execute the tool function
     try:
-        result = await tool_function(**params)
+        if tool_name in COALESCED_TOOLS and is_async:
+            result = await coalesced_call(tool_name, tool_function, params)
+        elif is_async:
+            result = await tool_function(**params)
+        else:
+            result = await asyncio.to_thread(tool_function, **params)
         return result
     except Exception as e:
-        logger.error(f"Error executing {tool_name}: {e}")
+        logger.error("Error executing %s: %s", tool_name, e)
         raise HTTPException(status_code=500, detail=str(e))
 
 def main():
@@ -134,15 +257,31 @@ def main():
     # Get host and port
     host = os.environ.get("DB_HOST", "127.0.0.1")
     port = int(os.environ.get("DB_PORT", "8000"))
+    # Each worker process has its own connection pool, caches and in-flight
+    # call map, so extra workers multiply connections and split cache hits;
+    # one worker is the default and more are opt-in
+    workers = int(os.environ.get("WEB_WORKERS", "1"))
     
     print(f"SQL MCP Server - Direct FastAPI Server")
     print(f"---------------------------------------")
     print(f"Database: {os.environ.get('DB_SERVER')}/{os.environ.get('DB_NAME')}")
     print(f"Available tools: {', '.join(available_tools.keys())}")
-    print(f"Server running at: http://{host}:{port}")
+    print(f"Server running at: http://{host}:{port} ({workers} workers)")
     
-    # Start the server
-    uvicorn.run(app, host=host, port=port)
+    # Start the server. "auto" selects uvloop and httptools when they are
+    # installed (uvicorn[standard]) and falls back to asyncio/h11 otherwise,
+    # e.g. on Windows where uvloop is unavailable. The app is passed as an
+    # import string so each worker process can re-import it (tools register
+    # at import time).
+    uvicorn.run(
+        "direct_server:app",
+        host=host,
+        port=port,
+        workers=workers,
+        loop="auto",
+        http="auto",
+        log_level="info"
+    )
 
 if __name__ == "__main__":
     main()
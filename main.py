@@ -5,10 +5,11 @@ import sys
 import os
 import logging
 import traceback
-import json
 import re
 import time
 
+import orjson
+
 # Configure logging to stderr
 logging.basicConfig(
     level=logging.DEBUG,
@@ -22,6 +23,42 @@ logger = logging.getLogger("DB_USER")
 src_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
 sys.path.insert(0, src_dir)
 
+# Patterns used on every stdin/stdout message, compiled once
+_PREFIX_RE = re.compile(r'^(\d{4}-\d{2}-\d{2}.*?|[a-z]+\s+)(\{.*)')
+_TIMESTAMP_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+def _looks_like_json(s):
+    """Cheap structural check for a single JSON object message."""
+    s = s.strip()
+    return s.startswith('{') and s.endswith('}')
+
+def _find_json_object(s):
+    """Return the first balanced {...} object in s, honoring string escapes."""
+    depth = 0
+    start = -1
+    in_str = False
+    esc = False
+    for i, c in enumerate(s):
+        if in_str:
+            if esc:
+                esc = False
+            elif c == '\\':
+                esc = True
+            elif c == '"':
+                in_str = False
+            continue
+        if c == '"':
+            in_str = True
+        elif c == '{':
+            if depth == 0:
+                start = i
+            depth += 1
+        elif c == '}' and depth > 0:
+            depth -= 1
+            if depth == 0:
+                return s[start:i + 1]
+    return None
+
 # Store original stdin/stdout for reference
 original_stdin = sys.stdin
 original_stdout = sys.stdout
@@ -37,9 +74,9 @@ def set_default_env_vars():
     for key, value in defaults.items():
         if key not in os.environ:
             os.environ[key] = value
-            logger.info(f"Set default environment variable: {key}={value}")
+            logger.info("Set default environment variable: %s=%s", key, value)
     
-    logger.info(f"Environment variables: {get_env_vars()}")
+    logger.info("Environment variables: %s", get_env_vars())
 
 def get_env_vars():
     """Get DB_USER environment variables for logging."""
@@ -79,7 +116,7 @@ class RobustStdinMiddleware:
             return processed_line
             
         except Exception as e:
-            logger.error(f"Error in stdin middleware: {str(e)}")
+            logger.error("Error in stdin middleware: %s", e)
             logger.error(traceback.format_exc())
             return line  # Return original line if processing fails
     
@@ -88,16 +125,19 @@ class RobustStdinMiddleware:
         if not line:
             return line
             
+        # Fast path: a well-formed JSON-RPC line needs no preprocessing
+        if isinstance(line, str) and _looks_like_json(line):
+            return line
+            
         # Convert bytes to string if needed
         if isinstance(line, bytes):
+            # Handle 'text' prefix in bytes before paying for a decode
+            if line.startswith(b'text'):
+                logger.info("Removing 'text' prefix from bytes message")
+                return line[4:]
+                
             try:
                 line_str = line.decode('utf-8')
-                
-                # Handle 'text' prefix in bytes
-                if line.startswith(b'text'):
-                    logger.info("Removing 'text' prefix from bytes message")
-                    return line[4:]
-                    
             except UnicodeDecodeError:
                 logger.warning("Failed to decode bytes to string")
                 return line
@@ -113,78 +153,77 @@ class RobustStdinMiddleware:
         # Check for other prefixes using regex for known prefix patterns
         if isinstance(line_str, str):
             # Handle common prefixes with a more specific pattern
-            prefix_match = re.match(r'^(\d{4}-\d{2}-\d{2}.*?|[a-z]+\s+)(\{.*)', line_str)
+            prefix_match = _PREFIX_RE.match(line_str)
             if prefix_match:
-                logger.info(f"Detected protocol prefix - extracting JSON part")
+                logger.info("Detected protocol prefix - extracting JSON part")
                 json_part = prefix_match.group(2)
                 # Validate the extracted JSON
                 try:
-                    json.loads(json_part)
+                    orjson.loads(json_part)
                     logger.debug("Successfully extracted valid JSON from prefixed message")
                     return json_part
-                except json.JSONDecodeError:
+                except orjson.JSONDecodeError:
                     logger.warning("Extracted text is not valid JSON")
         
-        # Validate JSON or try to extract it
+        # Pass through JSON-shaped lines or try to extract JSON from them
         if isinstance(line_str, str):
-            # First check if the entire string is valid JSON
-            try:
-                json.loads(line_str)
-                logger.debug("Line contains valid JSON")
+            # The JSON-RPC reader parses the message anyway and reports real
+            # syntax errors, so a structural check is enough here
+            if _looks_like_json(line_str):
+                logger.debug("Line looks like a JSON message")
                 return line_str
-            except json.JSONDecodeError:
-                logger.warning("Line does not contain valid JSON")
-                
-                # Try to extract JSON-like content
-                try:
-                    # Look for JSON objects (either complete or partial)
-                    json_match = re.search(r'(\{(?:[^{}]|(?1))*\})', line_str)
-                    if json_match:
-                        potential_json = json_match.group(1)
-                        try:
-                            json.loads(potential_json)  # Validate
-                            logger.info("Found and extracted valid JSON within message")
-                            return potential_json
-                        except json.JSONDecodeError:
-                            logger.warning("Extracted potential JSON is invalid")
-                except Exception as ex:
-                    logger.error(f"Error during JSON extraction: {str(ex)}")
+
+            logger.warning("Line does not contain valid JSON")
+
+            # Try to extract JSON-like content
+            try:
+                # Look for the first balanced JSON object
+                potential_json = _find_json_object(line_str)
+                if potential_json:
+                    try:
+                        orjson.loads(potential_json)  # Validate
+                        logger.info("Found and extracted valid JSON within message")
+                        return potential_json
+                    except orjson.JSONDecodeError:
+                        logger.warning("Extracted potential JSON is invalid")
+            except Exception as ex:
+                logger.error("Error during JSON extraction: %s", ex)
         
         return line  # Return original or decoded line if no processing was needed
     
     def debug_input(self, data, prefix="INPUT"):
         """Debug input data in various formats."""
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
         try:
             if data:
-                logger.debug(f"--- {prefix} DEBUG ---")
+                logger.debug("--- %s DEBUG ---", prefix)
                 
                 # Debug as raw
                 if isinstance(data, bytes):
-                    logger.debug(f"{prefix} as bytes: {data[:50]}...")
+                    logger.debug("%s as bytes: %s...", prefix, data[:50])
                     
                     # Try to decode
                     try:
                         as_str = data.decode('utf-8')
-                        logger.debug(f"{prefix} decoded as UTF-8: {as_str[:50]}...")
+                        logger.debug("%s decoded as UTF-8: %s...", prefix, as_str[:50])
                     except UnicodeDecodeError:
-                        logger.debug(f"{prefix} could not be decoded as UTF-8")
+                        logger.debug("%s could not be decoded as UTF-8", prefix)
                 else:
-                    logger.debug(f"{prefix} as string: {data[:50]}...")
-                
-                # Try to parse as JSON
-                if isinstance(data, str):
-                    try:
-                        json.loads(data)
-                        logger.debug(f"{prefix} is valid JSON")
-                    except json.JSONDecodeError:
-                        logger.debug(f"{prefix} is not valid JSON")
+                    logger.debug("%s as string: %s...", prefix, data[:50])
                 
         except Exception as e:
-            logger.error(f"Error debugging input: {str(e)}")
+            logger.error("Error debugging input: %s", e)
     
     def __getattr__(self, name):
         """Pass through other attribute access to the original stdin."""
-        return getattr(self.original_stdin, name)
+        value = getattr(self.original_stdin, name)
+        # Bound methods (fileno, read, ...) never change, so keep them on the
+        # instance and skip this fallback on later lookups. Plain attributes
+        # like `closed` can change and are always read through.
+        if callable(value):
+            setattr(self, name, value)
+        return value
 
 class JSONOnlyStdoutWrapper:
     """
@@ -194,50 +233,106 @@ class JSONOnlyStdoutWrapper:
         self.original_stdout = sys.stdout
         sys.stdout = self
         logger.info("Installed JSON-only stdout wrapper")
-        self.buffer = ""
+        # Partial JSON messages are collected as chunks while tracking
+        # bracket depth, so they are joined and parsed only once complete
+        self.buffer_parts = []
+        self.buffer_len = 0
+        self.buffer_depth = 0
+        self.buffer_in_str = False
+        self.buffer_esc = False
     
     def write(self, data):
         """Write data to stdout only if it's valid JSON, otherwise log to stderr."""
         if not data:
             return 0
             
+        # Decode bytes so they take the same path as text, including the
+        # partial-message buffer
+        if isinstance(data, bytes):
+            self.write(data.decode('utf-8', errors='replace'))
+            return len(data)
+            
         # Check if data has timestamp patterns that indicate log messages
-        if isinstance(data, str) and re.match(r'\d{4}-\d{2}-\d{2}', data):
+        if _TIMESTAMP_RE.match(data):
             # This is a log message, redirect to stderr
             sys.stderr.write(data)
             return len(data)
             
         # For JSON-like data, pass it through directly
-        if isinstance(data, str) and (data.strip().startswith('{') or data.strip().startswith('[')):
+        stripped = data.strip()
+        if stripped.startswith('{') or stripped.startswith('['):
             try:
                 # Try to parse as JSON to validate
-                json.loads(data.strip())
+                orjson.loads(stripped)
                 logger.debug("Writing JSON message to stdout")
                 return self.original_stdout.write(data)
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 # Not valid JSON, might be a partial message, buffer it
                 logger.debug("Found JSON-like data but not valid JSON")
-                self.buffer += data.strip()
+                return self._buffer_chunk(data)
                 
-                # Check if buffer now contains valid JSON
-                try:
-                    json.loads(self.buffer)
-                    logger.debug("Writing buffered JSON message to stdout")
-                    result = self.original_stdout.write(self.buffer)
-                    self.buffer = ""  # Clear buffer after writing
-                    return result
-                except json.JSONDecodeError:
-                    # Still not valid JSON
-                    if len(self.buffer) > 10000:
-                        logger.warning("Buffer too large with no valid JSON, clearing")
-                        self.buffer = ""
-                    return len(data)
+        # Continue a partial message that is already being buffered
+        if self.buffer_parts:
+            return self._buffer_chunk(data)
                 
         # For anything else, send to stderr for debugging
         logger.debug("Non-JSON data detected")
         sys.stderr.write(data)
         return len(data)
     
+    def _buffer_chunk(self, data):
+        """Add a chunk to the partial-message buffer and flush it once balanced."""
+        chunk = data.strip()
+        self.buffer_parts.append(chunk)
+        self.buffer_len += len(chunk)
+        
+        # Walk only the new characters, carrying scanner state across chunks
+        depth = self.buffer_depth
+        in_str = self.buffer_in_str
+        esc = self.buffer_esc
+        for c in chunk:
+            if in_str:
+                if esc:
+                    esc = False
+                elif c == '\\':
+                    esc = True
+                elif c == '"':
+                    in_str = False
+            elif c == '"':
+                in_str = True
+            elif c in '{[':
+                depth += 1
+            elif c in '}]':
+                depth -= 1
+        self.buffer_depth = depth
+        self.buffer_in_str = in_str
+        self.buffer_esc = esc
+        
+        if depth > 0:
+            if self.buffer_len > 10000:
+                logger.warning("Buffer too large with no valid JSON, clearing")
+                self._reset_buffer()
+            return len(data)
+        
+        # Brackets are balanced, so validate the whole message once
+        message = "".join(self.buffer_parts)
+        self._reset_buffer()
+        try:
+            orjson.loads(message)
+        except orjson.JSONDecodeError:
+            logger.warning("Buffered data is not valid JSON, discarding")
+            return len(data)
+        logger.debug("Writing buffered JSON message to stdout")
+        return self.original_stdout.write(message)
+    
+    def _reset_buffer(self):
+        """Clear the partial-message buffer and scanner state."""
+        self.buffer_parts = []
+        self.buffer_len = 0
+        self.buffer_depth = 0
+        self.buffer_in_str = False
+        self.buffer_esc = False
+    
     def flush(self):
         """Pass through flush to original stdout."""
         return self.original_stdout.flush()
@@ -262,17 +357,15 @@ if __name__ == "__main__":
             # Try to load from .env file first
             env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
             if os.path.exists(env_path):
-                logger.info(f"Loading credentials from .env file: {env_path}")
+                logger.info("Loading credentials from .env file: %s", env_path)
                 try:
-                    with open(env_path, 'r') as f:
-                        for line in f:
-                            if line.strip() and not line.startswith('#'):
-                                key, value = line.strip().split('=', 1)
-                                if key and value and key not in os.environ:
-                                    os.environ[key] = value
+                    from dotenv import dotenv_values
+                    for key, value in dotenv_values(env_path).items():
+                        if value:
+                            os.environ.setdefault(key, value)
                     logger.info("Successfully loaded credentials from .env file")
                 except Exception as e:
-                    logger.warning(f"Error loading .env file: {str(e)}")
+                    logger.warning("Error loading .env file: %s", e)
         
         # Import MCP server modules
         from DB_USER.server import server, start_server
@@ -284,6 +377,6 @@ if __name__ == "__main__":
         # Run the server
         start_server()
     except Exception as e:
-        logger.error(f"Error in main: {str(e)}")
+        logger.error("Error in main: %s", e)
         logger.error(traceback.format_exc())
         sys.exit(1)
\ No newline at end of file
@@ -10,8 +10,17 @@ import os
 import pyodbc
 import asyncio
 import time
+import queue
+import threading
 import importlib
-from typing import Dict, List, Any, Optional
+import inspect
+import re
+import orjson
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache, partial, wraps
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Any, Iterator, Optional, Tuple
 
 # Add the project root to sys.path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -39,10 +48,18 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Configuration Loading - Priority order: DB_ (standard), SQLMCP_ (transitional), DB_USER_ (legacy)
-DB_SERVER = os.environ.get("DB_SERVER", os.environ.get("SQLMCP_DB_SERVER", os.environ.get("DB_USER_DB_SERVER", "localhost")))
-DB_NAME = os.environ.get("DB_NAME", os.environ.get("SQLMCP_DB_NAME", os.environ.get("DB_USER_DB_NAME", "database")))
-DB_USERNAME = os.environ.get("DB_USERNAME", os.environ.get("SQLMCP_DB_USERNAME", os.environ.get("DB_USER_DB_USERNAME", "")))
-DB_PASSWORD = os.environ.get("DB_PASSWORD", os.environ.get("SQLMCP_DB_PASSWORD", os.environ.get("DB_USER_DB_PASSWORD", "")))
+def _resolve(*keys: str, default: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+    """Return (value, key) for the first of keys set in the environment, else (default, None)."""
+    for key in keys:
+        value = os.environ.get(key)
+        if value is not None:
+            return value, key
+    return default, None
+
+DB_SERVER, _server_key = _resolve("DB_SERVER", "SQLMCP_DB_SERVER", "DB_USER_DB_SERVER", default="localhost")
+DB_NAME, _ = _resolve("DB_NAME", "SQLMCP_DB_NAME", "DB_USER_DB_NAME", default="database")
+DB_USERNAME, _ = _resolve("DB_USERNAME", "SQLMCP_DB_USERNAME", "DB_USER_DB_USERNAME", default="")
+DB_PASSWORD, _ = _resolve("DB_PASSWORD", "SQLMCP_DB_PASSWORD", "DB_USER_DB_PASSWORD", default="")
 
 # Log the configuration for debugging
 logger.info(f"Configured DB_SERVER: {DB_SERVER}")
@@ -51,20 +68,15 @@ logger.info(f"Configured DB_USERNAME: {DB_USERNAME}")
 logger.info(f"Configured DB_PASSWORD: {'*' * 10}")
 
 # Log which prefix was actually used (helps with debugging)
-if os.environ.get("DB_SERVER"):
-    logger.info("Using DB_ prefix for configuration.")
-elif os.environ.get("SQLMCP_DB_SERVER"):
-    logger.info("Using SQLMCP_ prefix for configuration.")
-elif os.environ.get("DB_USER_DB_SERVER"):
-    logger.info("Using DB_USER_ prefix for configuration.")
+if _server_key:
+    logger.info(f"Using {_server_key} for configuration.")
 else:
     logger.info("No specific environment prefix found, using defaults.")
 
 try:
-    # Try all prefixes in priority order: DB_, SQLMCP_, DB_USER_
-    allowed_schemas_str = os.environ.get("DB_ALLOWED_SCHEMAS", 
-                                      os.environ.get("SQLMCP_ALLOWED_SCHEMAS", 
-                                                  os.environ.get("DB_USER_ALLOWED_SCHEMAS", '["dbo"]')))
+    allowed_schemas_str, _schemas_key = _resolve(
+        "DB_ALLOWED_SCHEMAS", "SQLMCP_ALLOWED_SCHEMAS", "DB_USER_ALLOWED_SCHEMAS", default='["dbo"]'
+    )
     
     ALLOWED_SCHEMAS = json.loads(allowed_schemas_str)
     if not isinstance(ALLOWED_SCHEMAS, list):
@@ -72,80 +84,236 @@ try:
     logger.info(f"Allowed schemas loaded: {ALLOWED_SCHEMAS}")
     
     # Log which prefix was used for schemas
-    if os.environ.get("DB_ALLOWED_SCHEMAS"):
-        logger.info("Using DB_ prefix for allowed schemas.")
-    elif os.environ.get("SQLMCP_ALLOWED_SCHEMAS"):
-        logger.info("Using SQLMCP_ prefix for allowed schemas.")
-    elif os.environ.get("DB_USER_ALLOWED_SCHEMAS"):
-        logger.info("Using DB_USER_ prefix for allowed schemas.")
+    if _schemas_key:
+        logger.info(f"Using {_schemas_key} for allowed schemas.")
     else:
         logger.info("Using default allowed schemas.")
 except (json.JSONDecodeError, ValueError) as e:
     logger.error(f"Invalid ALLOWED_SCHEMAS format: {e}. Using default ['dbo'].")
     ALLOWED_SCHEMAS = ["dbo"]
 
+# Set for per-request membership checks, tuple for IN (...) parameters
+_ALLOWED_SCHEMAS_SET = frozenset(ALLOWED_SCHEMAS)
+_ALLOWED_SCHEMAS_PARAMS = tuple(ALLOWED_SCHEMAS)
+
 # Database Connection Logic
 _conn: Optional[pyodbc.Connection] = None
 
+# Maximum number of pooled connections (checked out plus idle)
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+# Prepared catalog-query cursors kept per pooled connection
+DB_STMT_CACHE_SIZE = 32
+
+def _create_db_connection_blocking() -> pyodbc.Connection:
+    """Blocking function to open a new pyodbc connection."""
+    logger.info(f"Creating new connection to {DB_SERVER}/{DB_NAME}")
+    conn_str = f"Driver={{SQL Server}};Server={DB_SERVER};Database={DB_NAME};UID={DB_USERNAME};PWD={DB_PASSWORD};"
+    alt_server_name = DB_SERVER.replace('\\\\', '').replace('\\', '\\')
+    alt_conn_str = f"Driver={{SQL Server}};Server={alt_server_name};Database={DB_NAME};UID={DB_USERNAME};PWD={DB_PASSWORD};"
+
+    last_error = None
+    for fmt_name, c_str in [("standard", conn_str), ("alternative", alt_conn_str)]:
+        try:
+            conn = pyodbc.connect(c_str, autocommit=True, timeout=10)
+            logger.info(f"Connection successful with {fmt_name} format")
+            return conn
+        except pyodbc.Error as e:
+            logger.warning(f"{fmt_name.capitalize()} connection failed: {str(e)}")
+            last_error = e
+
+    logger.error(f"All connection attempts failed.")
+    raise ConnectionError(f"Database connection failed: {last_error}")
+
 def _get_db_connection_blocking() -> pyodbc.Connection:
     """Blocking function to get/create pyodbc connection."""
     global _conn
-    is_alive = False
-    if _conn:
-        try:
-            _conn.cursor().execute("SELECT 1").fetchall()
-            is_alive = True
-        except pyodbc.Error:
-            logger.warning("Existing connection seems dead. Reconnecting.")
-            try: _conn.close()
-            except pyodbc.Error: pass
-            _conn = None
+    # Checking `closed` is local; a connection the server dropped surfaces as
+    # an error on the caller's next query rather than costing a probe here.
+    # Callers close the connection on a disconnect error so it is replaced.
+    if _conn is not None and _conn.closed:
+        logger.warning("Existing connection is closed. Reconnecting.")
+        _conn = None
 
-    if _conn is None or not is_alive:
-        logger.info(f"Creating new connection to {DB_SERVER}/{DB_NAME}")
-        conn_str = f"Driver={{SQL Server}};Server={DB_SERVER};Database={DB_NAME};UID={DB_USERNAME};PWD={DB_PASSWORD};"
-        alt_server_name = DB_SERVER.replace('\\\\', '').replace('\\', '\\')
-        alt_conn_str = f"Driver={{SQL Server}};Server={alt_server_name};Database={DB_NAME};UID={DB_USERNAME};PWD={DB_PASSWORD};"
+    if _conn is None:
+        _conn = _create_db_connection_blocking()
 
-        connected = False
-        last_error = None
-        for fmt_name, c_str in [("standard", conn_str), ("alternative", alt_conn_str)]:
+    if _conn is None: raise ConnectionError("Failed to establish database connection.")
+    return _conn
+
+# SQLSTATEs meaning the connection itself is gone rather than the statement
+# having failed, so the statement is safe to retry on a new connection
+_DISCONNECT_SQLSTATES = frozenset({"08S01", "08003"})
+
+def _is_disconnected(error: pyodbc.Error) -> bool:
+    """Whether a pyodbc error reports a lost connection."""
+    return bool(error.args) and error.args[0] in _DISCONNECT_SQLSTATES
+
+class _ConnectionPool:
+    """Bounded pool of pyodbc connections shared by query execution.
+
+    Connections are opened lazily up to max_size. Idle ones are kept in a
+    LIFO queue so the most recently used (warmest) connection is reused
+    first, and a semaphore bounds how many can be checked out at once.
+    """
+
+    def __init__(self, max_size: int, connect: Callable[[], pyodbc.Connection]):
+        self.max_size = max_size
+        self._connect = connect
+        self._idle: "queue.LifoQueue[pyodbc.Connection]" = queue.LifoQueue(maxsize=max_size)
+        self._slots = threading.BoundedSemaphore(max_size)
+        # Per-connection LRU of cursors keyed by SQL text. A connection is
+        # only used by one thread at a time, so its cache needs no lock.
+        self._cursors: Dict[int, "OrderedDict[str, pyodbc.Cursor]"] = {}
+
+    @contextmanager
+    def acquire(self, timeout: float = 30) -> Iterator[pyodbc.Connection]:
+        """Check a connection out of the pool and return it when done."""
+        if not self._slots.acquire(timeout=timeout):
+            raise ConnectionError("Timed out waiting for a pooled database connection.")
+        conn = None
+        try:
             try:
-                _conn = pyodbc.connect(c_str, autocommit=True, timeout=10)
-                logger.info(f"Connection successful with {fmt_name} format")
-                connected = True
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            yield conn
+        except pyodbc.Error as e:
+            # Don't hand a lost connection to the next caller; a fresh one is
+            # opened on the next checkout. Statement errors (syntax, missing
+            # objects, permissions) leave the connection usable, so it and
+            # its cached cursors go back to the pool.
+            if conn is not None and (_is_disconnected(e) or conn.closed):
+                self._discard(conn)
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                try:
+                    self._idle.put_nowait(conn)
+                except queue.Full:
+                    self._discard(conn)
+            self._slots.release()
+
+    def run(self, work: Callable[[pyodbc.Connection], Any]) -> Any:
+        """Call work with a pooled connection, retrying once if it was disconnected.
+
+        Connections aren't probed on checkout; a dead one fails the real
+        query instead, and the retry drops the other idle connections too,
+        since they were most likely cut off by the same server restart or
+        network failure.
+        """
+        try:
+            with self.acquire() as conn:
+                return work(conn)
+        except pyodbc.Error as e:
+            if not _is_disconnected(e):
+                raise
+            logger.warning(f"Database connection lost ({e.args[0]}), retrying on a new connection")
+            self._drain_idle()
+        with self.acquire() as conn:
+            return work(conn)
+
+    def cursor(self, conn: pyodbc.Connection, query: str) -> pyodbc.Cursor:
+        """Return the cached cursor for query on conn, creating it if needed.
+
+        pyodbc keeps the last statement prepared on a cursor, so executing
+        the same SQL text on the same cursor skips the re-prepare.
+        """
+        cache = self._cursors.setdefault(id(conn), OrderedDict())
+        cur = cache.get(query)
+        if cur is not None:
+            cache.move_to_end(query)
+            return cur
+        cur = conn.cursor()
+        cache[query] = cur
+        if len(cache) > DB_STMT_CACHE_SIZE:
+            _, evicted = cache.popitem(last=False)
+            try: evicted.close()
+            except pyodbc.Error: pass
+        return cur
+
+    def _discard(self, conn: pyodbc.Connection) -> None:
+        """Close a connection and drop its cached cursors."""
+        self._cursors.pop(id(conn), None)
+        try: conn.close()
+        except pyodbc.Error: pass
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        self._drain_idle()
+        logger.info("Database connection pool closed.")
+
+    def _drain_idle(self) -> None:
+        """Close and remove every idle connection."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
                 break
-            except pyodbc.Error as e:
-                logger.warning(f"{fmt_name.capitalize()} connection failed: {str(e)}")
-                last_error = e
+            self._cursors.pop(id(conn), None)
+            try: conn.close()
+            except pyodbc.Error as e: logger.warning(f"Error closing pooled connection: {e}")
 
-        if not connected:
-            logger.error(f"All connection attempts failed.")
-            raise ConnectionError(f"Database connection failed: {last_error}")
+_POOL = _ConnectionPool(DB_POOL_SIZE, _create_db_connection_blocking)
 
-    if _conn is None: raise ConnectionError("Failed to establish database connection.")
-    return _conn
+# Blocking database work runs on its own executor with one thread per pooled
+# connection, instead of the default executor shared with everything else
+_DB_EXEC = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="sqlmcp-db")
 
-def _execute_query_blocking(query: str, params: Optional[tuple] = None, max_rows: int = 1000) -> List[Dict[str, Any]]:
-    """Blocking function to execute pyodbc query."""
+async def _run_db(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking database call on the database executor."""
+    return await asyncio.get_running_loop().run_in_executor(_DB_EXEC, partial(fn, *args, **kwargs))
+
+def close_connection_pool() -> None:
+    """Close all idle pooled connections."""
+    _POOL.close()
+
+def _column_type_name(type_code: Any) -> str:
+    """Name of the Python type pyodbc reports for a result column."""
+    return getattr(type_code, "__name__", "unknown")
+
+def _execute_query_columnar_blocking(query: str, params: Optional[tuple] = None, max_rows: int = 1000,
+                                     reuse_cursor: bool = False) -> Tuple[List[str], List[str], List[tuple]]:
+    """Blocking function to execute pyodbc query, returning column names, column types and row tuples.
+
+    Column types come from cursor.description, so they are known even when
+    the result is empty or a column's first value is NULL.
+
+    reuse_cursor keeps the prepared statement on a per-connection cursor for
+    fixed-text queries (the catalog lookups) instead of re-preparing it.
+    """
     logger.debug(f"Executing query: {query[:100]}... with params: {params}")
-    try:
-        connection = _get_db_connection_blocking()
-        cursor = connection.cursor()
+
+    def run(connection: pyodbc.Connection) -> Tuple[List[str], List[str], List[tuple]]:
+        cursor = _POOL.cursor(connection, query) if reuse_cursor else connection.cursor()
+        # Fetch in driver-side batches rather than one row per round trip
+        cursor.arraysize = min(max_rows, 1000) if max_rows > 0 else 1000
         cursor.execute(query, params if params else [])
 
-        results = []
+        columns: List[str] = []
+        column_types: List[str] = []
+        rows: List[tuple] = []
         if cursor.description:
             columns = [column[0] for column in cursor.description]
-            rows = cursor.fetchmany(max_rows) if max_rows > 0 else cursor.fetchall()
-            for row in rows:
-                results.append(dict(zip(columns, row)))
+            column_types = [_column_type_name(column[1]) for column in cursor.description]
+            fetched = cursor.fetchmany(max_rows) if max_rows > 0 else cursor.fetchall()
+            rows = [tuple(row) for row in fetched]
         else:
             logger.debug("Query did not return rows.")
 
-        cursor.close()
-        logger.debug(f"Query successful, {len(results)} rows fetched.")
-        return results
+        if reuse_cursor:
+            # Discard any unread rows so the connection isn't left busy,
+            # keeping the statement prepared for the next call
+            while cursor.nextset():
+                pass
+        else:
+            cursor.close()
+        return columns, column_types, rows
+
+    try:
+        columns, column_types, rows = _POOL.run(run)
+        logger.debug(f"Query successful, {len(rows)} rows fetched.")
+        return columns, column_types, rows
     except pyodbc.Error as db_err:
         logger.error(f"Query execution failed: {str(db_err)}")
         raise ValueError(f"Query failed: {str(db_err)}")
@@ -153,14 +321,162 @@ def _execute_query_blocking(query: str, params: Optional[tuple] = None, max_rows
         logger.error(f"Unexpected error during query execution: {str(e)}")
         raise ValueError(f"Internal server error during query: {str(e)}")
 
+def _iter_query_chunks_blocking(query: str, params: Optional[tuple] = None,
+                                chunk_size: int = 500) -> Iterator[Tuple[List[str], List[tuple]]]:
+    """Blocking generator yielding (columns, rows) chunks of a query's result.
+
+    The pooled connection stays checked out until the generator is exhausted
+    or closed, so only chunk_size rows are held in memory at a time.
+    """
+    logger.debug(f"Streaming query: {query[:100]}... with params: {params}")
+    with _POOL.acquire() as connection:
+        cursor = connection.cursor()
+        try:
+            cursor.arraysize = chunk_size
+            cursor.execute(query, params if params else [])
+            if not cursor.description:
+                return
+            columns = [column[0] for column in cursor.description]
+            while True:
+                fetched = cursor.fetchmany(chunk_size)
+                if not fetched:
+                    break
+                yield columns, [tuple(row) for row in fetched]
+        finally:
+            cursor.close()
+
+def _execute_query_multi_blocking(query: str, params: Optional[tuple] = None) -> List[Tuple[List[str], List[tuple]]]:
+    """Blocking function to execute a multi-statement batch, returning (columns, rows) per result set."""
+    logger.debug(f"Executing batch: {query[:100]}... with params: {params}")
+
+    def run(connection: pyodbc.Connection) -> List[Tuple[List[str], List[tuple]]]:
+        cursor = connection.cursor()
+        cursor.arraysize = 1000
+        cursor.execute(query, params if params else [])
+
+        result_sets: List[Tuple[List[str], List[tuple]]] = []
+        while True:
+            # Statements without a result set (e.g. SET) have no description
+            if cursor.description:
+                columns = [column[0] for column in cursor.description]
+                result_sets.append((columns, [tuple(row) for row in cursor.fetchall()]))
+            if not cursor.nextset():
+                break
+
+        cursor.close()
+        return result_sets
+
+    try:
+        result_sets = _POOL.run(run)
+        logger.debug(f"Batch successful, {len(result_sets)} result sets fetched.")
+        return result_sets
+    except pyodbc.Error as db_err:
+        logger.error(f"Batch execution failed: {str(db_err)}")
+        raise ValueError(f"Query failed: {str(db_err)}")
+    except Exception as e:
+        logger.error(f"Unexpected error during batch execution: {str(e)}")
+        raise ValueError(f"Internal server error during query: {str(e)}")
+
+def _execute_query_blocking(query: str, params: Optional[tuple] = None, max_rows: int = 1000,
+                            reuse_cursor: bool = False) -> List[Dict[str, Any]]:
+    """Blocking function to execute pyodbc query."""
+    columns, _, rows = _execute_query_columnar_blocking(query, params, max_rows, reuse_cursor)
+    return [dict(zip(columns, row)) for row in rows]
+
+# Catalog metadata cache. INFORMATION_SCHEMA/sys catalog results change
+# rarely, so list_tables, get_table_schema and find_foreign_keys keep them
+# for DB_META_TTL seconds (0 disables caching). refresh_metadata clears it.
+DB_META_TTL = int(os.environ.get("DB_META_TTL", "300"))
+_METADATA_CACHE: Dict[tuple, tuple] = {}
+_METADATA_CACHE_LOCK = threading.Lock()
+
+async def _cached(key: tuple, ttl: int, loader: Callable[[], Awaitable[Any]]) -> Any:
+    """Return the cached value for key, calling loader on a miss or expiry."""
+    if ttl > 0:
+        with _METADATA_CACHE_LOCK:
+            entry = _METADATA_CACHE.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+    value = await loader()
+    if ttl > 0:
+        with _METADATA_CACHE_LOCK:
+            _METADATA_CACHE[key] = (time.monotonic() + ttl, value)
+    return value
+
+# execute_select result cache. Identical SELECTs (same normalized text,
+# parameters and limit) within DB_RESULT_TTL seconds are answered without a
+# database round trip (0 disables). clear_query_cache empties it.
+DB_RESULT_TTL = int(os.environ.get("DB_RESULT_TTL", "30"))
+_RESULT_CACHE_MAX_ENTRIES = 256
+_RESULT_CACHE_MAX_ROWS = 5000
+_RESULT_CACHE: Dict[tuple, tuple] = {}
+_RESULT_CACHE_LOCK = threading.Lock()
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def _normalize_query(query: str) -> str:
+    """Collapse whitespace so formatting differences share a cache entry."""
+    query = query.strip()
+    # Whitespace inside string literals is significant, so leave those alone
+    if "'" in query:
+        return query
+    return _WHITESPACE_RE.sub(" ", query)
+
+def _result_cache_get(key: tuple) -> Optional[Tuple[List[str], List[str], List[tuple]]]:
+    """Return cached (columns, column_types, rows) for key if present and not expired."""
+    with _RESULT_CACHE_LOCK:
+        entry = _RESULT_CACHE.get(key)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+def _result_cache_put(key: tuple, value: Tuple[List[str], List[str], List[tuple]]) -> None:
+    """Store (columns, column_types, rows) under key, evicting expired then oldest entries."""
+    now = time.monotonic()
+    with _RESULT_CACHE_LOCK:
+        if len(_RESULT_CACHE) >= _RESULT_CACHE_MAX_ENTRIES:
+            for stale in [k for k, (expires, _) in _RESULT_CACHE.items() if expires <= now]:
+                del _RESULT_CACHE[stale]
+            while len(_RESULT_CACHE) >= _RESULT_CACHE_MAX_ENTRIES:
+                del _RESULT_CACHE[next(iter(_RESULT_CACHE))]
+        _RESULT_CACHE[key] = (now + DB_RESULT_TTL, value)
+
+_SELECT_RE = re.compile(r"^\s*SELECT\b", re.IGNORECASE)
+_FORBIDDEN_RE = re.compile(
+    r"\b(?:INSERT|UPDATE|DELETE|DROP|CREATE|ALTER|EXEC|EXECUTE)\b|\b(?:SP_|XP_)",
+    re.IGNORECASE
+)
+
+@lru_cache(maxsize=512)
 def is_safe_query(query):
     """Validate if the query is a safe SELECT statement."""
-    query = query.strip().upper()
-    if not query.startswith("SELECT"): return False
-    forbidden = ["INSERT", "UPDATE", "DELETE", "DROP", "CREATE", "ALTER", "EXEC", "EXECUTE", "SP_", "XP_"]
-    for word in forbidden:
-        if word in query: return False
-    return True
+    return bool(_SELECT_RE.match(query)) and not _FORBIDDEN_RE.search(query)
+
+# Leading SELECT (after any block comments), including DISTINCT/ALL, where
+# the statement doesn't already carry a TOP clause
+_SELECT_HEAD_RE = re.compile(
+    r"^(\s*(?:/\*.*?\*/\s*)*SELECT(?:\s+(?:DISTINCT|ALL)\b|(?!\s+(?:DISTINCT|ALL)\b)))(?!\s+TOP\b)(?!\w)",
+    re.IGNORECASE | re.DOTALL
+)
+
+# TOP is bound as a parameter so SQL Server caches one plan for every limit;
+# limits are clamped to the int range the driver binds them as
+_MAX_TOP_ROWS = 2**31 - 1
+
+@lru_cache(maxsize=512)
+def _inject_top(query: str) -> Tuple[str, bool]:
+    """Inject a TOP (?) placeholder into a SELECT query unless it already has TOP."""
+    processed_query, count = _SELECT_HEAD_RE.subn(r"\1 TOP (?)", query.strip(), count=1)
+    return processed_query, count > 0
+
+def _apply_top(query: str, limit: int, params: Optional[tuple] = None) -> Tuple[str, Optional[tuple]]:
+    """Limit a SELECT query to limit rows, returning the query and its parameters."""
+    if limit <= 0:
+        return query.strip(), params
+    processed_query, injected = _inject_top(query)
+    if injected:
+        # The TOP placeholder precedes any in the query body
+        params = (min(int(limit), _MAX_TOP_ROWS),) + (params or ())
+    return processed_query, params
 
 # Create FastMCP Server Instance
 mcp = FastMCP(
@@ -178,8 +494,50 @@ except ImportError as e:
     logger.error(traceback.format_exc())
     sys.exit(1)
 
+# list_tables query text only varies by whether one schema is requested and
+# whether views are included, so all four variants are built once. The same
+# text every call also lets SQL Server reuse one cached plan.
+def _build_list_tables_query(single_schema: bool, include_views: bool) -> str:
+    """Build the list_tables catalog query for one filter combination."""
+    query = "SELECT t.TABLE_SCHEMA, t.TABLE_NAME, t.TABLE_TYPE FROM INFORMATION_SCHEMA.TABLES t"
+    if single_schema:
+        query += " WHERE t.TABLE_SCHEMA = ?"
+    else:
+        query += f" WHERE t.TABLE_SCHEMA IN ({', '.join('?' * len(_ALLOWED_SCHEMAS_PARAMS))})"
+    if not include_views: query += " AND t.TABLE_TYPE = 'BASE TABLE'"
+    return query + " ORDER BY t.TABLE_SCHEMA, t.TABLE_NAME"
+
+_LIST_TABLES_QUERIES = {
+    (single_schema, include_views): _build_list_tables_query(single_schema, include_views)
+    for single_schema in (False, True) for include_views in (False, True)
+}
+
+def _orjson_default(value: Any) -> Any:
+    """Serialize the pyodbc values orjson has no native encoding for."""
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    return str(value)
+
+def json_tool(tool_function: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Register an async tool with MCP, serializing its result with orjson.
+
+    FastMCP passes non-string results through stdlib json; returning the
+    encoded text instead is much cheaper for large row sets. The undecorated
+    function is returned, so direct_server still gets plain dicts.
+    """
+    @wraps(tool_function)
+    async def wrapper(*args: Any, **kwargs: Any) -> str:
+        result = await tool_function(*args, **kwargs)
+        return orjson.dumps(result, default=_orjson_default).decode()
+    # FastMCP reads the signature (through __wrapped__) for the tool schema;
+    # advertise the str this wrapper actually returns
+    wrapper.__annotations__ = {**tool_function.__annotations__, "return": str}
+    wrapper.__signature__ = inspect.signature(tool_function).replace(return_annotation=str)
+    mcp.tool()(wrapper)
+    return tool_function
+
 # Define built-in tools
-@mcp.tool()
+@json_tool
 async def list_tables(schema: Optional[str] = None, include_views: bool = False) -> List[Dict[str, Any]]:
     """
     List tables/views in allowed schemas.
@@ -189,29 +547,21 @@ async def list_tables(schema: Optional[str] = None, include_views: bool = False)
     """
     logger.info(f"Handling list_tables: schema={schema}, include_views={include_views}")
 
-    query = "SELECT t.TABLE_SCHEMA, t.TABLE_NAME, t.TABLE_TYPE FROM INFORMATION_SCHEMA.TABLES t WHERE 1=1"
-    query_params_list = []
-
     if schema:
-        if schema not in ALLOWED_SCHEMAS:
+        if schema not in _ALLOWED_SCHEMAS_SET:
              raise ValueError(f"Schema '{schema}' is not in the allowed list: {ALLOWED_SCHEMAS}")
-        query += " AND t.TABLE_SCHEMA = ?"
-        query_params_list.append(schema)
+        query_params = (schema,)
     elif ALLOWED_SCHEMAS:
-        schema_placeholders = ", ".join(["?" for _ in ALLOWED_SCHEMAS])
-        query += f" AND t.TABLE_SCHEMA IN ({schema_placeholders})"
-        query_params_list.extend(ALLOWED_SCHEMAS)
+        query_params = _ALLOWED_SCHEMAS_PARAMS
     else:
          raise ValueError("No allowed schemas configured.")
-
-    if not include_views: query += " AND t.TABLE_TYPE = 'BASE TABLE'"
-    query += " ORDER BY t.TABLE_SCHEMA, t.TABLE_NAME"
+    query = _LIST_TABLES_QUERIES[(bool(schema), bool(include_views))]
 
     try:
-        tables = await asyncio.to_thread(
-            _execute_query_blocking,
-            query,
-            tuple(query_params_list)
+        tables = await _cached(
+            ("list_tables", schema, include_views, _ALLOWED_SCHEMAS_PARAMS),
+            DB_META_TTL,
+            lambda: _run_db(_execute_query_blocking, query, query_params, reuse_cursor=True)
         )
         logger.info(f"Retrieved {len(tables)} tables/views")
         return tables
@@ -219,7 +569,7 @@ async def list_tables(schema: Optional[str] = None, include_views: bool = False)
          logger.error(f"Error in list_tables handler: {e}")
          raise ValueError(f"Failed to list tables: {e}") from e
 
-@mcp.tool()
+@json_tool
 async def get_table_schema(table_name: str) -> Dict[str, Any]:
     """
     Get schema (columns, FKs) for a table in allowed schemas.
@@ -233,11 +583,10 @@ async def get_table_schema(table_name: str) -> Dict[str, Any]:
     parts = table_name.split('.')
     schema_name, table_name_only = (parts[0], parts[1]) if len(parts) == 2 else ('dbo', parts[0])
 
-    if schema_name not in ALLOWED_SCHEMAS:
+    if schema_name not in _ALLOWED_SCHEMAS_SET:
         raise ValueError(f"Schema '{schema_name}' is not allowed.")
 
     # Define queries
-    validate_query = "SELECT COUNT(*) AS count FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ?"
     columns_query = """
     SELECT c.COLUMN_NAME, c.DATA_TYPE, c.CHARACTER_MAXIMUM_LENGTH, c.NUMERIC_PRECISION,
            c.NUMERIC_SCALE, c.IS_NULLABLE, c.COLUMN_DEFAULT,
@@ -258,37 +607,119 @@ async def get_table_schema(table_name: str) -> Dict[str, Any]:
     WHERE s.name = ? AND OBJECT_NAME(fk.parent_object_id) = ?
     """
 
-    try:
-        # Validate table exists
-        validation_result = await asyncio.to_thread(
-            _execute_query_blocking, validate_query, (schema_name, table_name_only)
+    async def load_schema() -> Dict[str, Any]:
+        # Get columns and FKs concurrently; a table always has at least one
+        # column, so an empty column list means it doesn't exist
+        columns, foreign_keys = await asyncio.gather(
+            _run_db(_execute_query_blocking, columns_query, (schema_name, table_name_only), reuse_cursor=True),
+            _run_db(_execute_query_blocking, fk_query, (schema_name, table_name_only), reuse_cursor=True)
         )
-        if not validation_result or validation_result[0].get('count', 0) == 0:
+        if not columns:
             raise ValueError(f"Table '{schema_name}.{table_name_only}' not found or not allowed.")
+        return {"table_name": f"{schema_name}.{table_name_only}", "columns": columns, "foreign_keys": foreign_keys}
 
-        # Get columns and FKs
-        columns = await asyncio.to_thread(
-            _execute_query_blocking, columns_query, (schema_name, table_name_only)
-        )
-        foreign_keys = await asyncio.to_thread(
-            _execute_query_blocking, fk_query, (schema_name, table_name_only)
-        )
-
-        result = {"table_name": f"{schema_name}.{table_name_only}", "columns": columns, "foreign_keys": foreign_keys}
+    try:
+        result = await _cached(("get_table_schema", schema_name, table_name_only), DB_META_TTL, load_schema)
         logger.info(f"Retrieved schema for table {schema_name}.{table_name_only}")
         return result
     except Exception as e:
          logger.error(f"Error in get_table_schema handler: {e}")
          raise ValueError(f"Failed to get table schema: {e}") from e
 
-@mcp.tool()
-async def execute_select(query: str, limit: int = 100, parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+@json_tool
+async def list_tables_with_schemas(schema: Optional[str] = None, include_views: bool = False) -> Dict[str, Any]:
+    """
+    List tables/views with their columns and foreign keys in one round trip.
+    Use instead of list_tables followed by get_table_schema for every table.
+    Args:
+        schema: Optional schema name to filter by. Must be one of allowed schemas.
+        include_views: Whether to include views (default: false).
+    """
+    logger.info(f"Handling list_tables_with_schemas: schema={schema}, include_views={include_views}")
+
+    if schema:
+        if schema not in _ALLOWED_SCHEMAS_SET:
+             raise ValueError(f"Schema '{schema}' is not in the allowed list: {ALLOWED_SCHEMAS}")
+        schemas = [schema]
+    elif ALLOWED_SCHEMAS:
+        schemas = list(_ALLOWED_SCHEMAS_PARAMS)
+    else:
+         raise ValueError("No allowed schemas configured.")
+
+    schema_placeholders = ", ".join(["?" for _ in schemas])
+    table_type_filter = "" if include_views else " AND t.TABLE_TYPE = 'BASE TABLE'"
+    # Tables, columns and foreign keys as three result sets of one batch
+    batch_query = f"""
+    SET NOCOUNT ON;
+    SELECT t.TABLE_SCHEMA, t.TABLE_NAME, t.TABLE_TYPE FROM INFORMATION_SCHEMA.TABLES t
+    WHERE t.TABLE_SCHEMA IN ({schema_placeholders}){table_type_filter}
+    ORDER BY t.TABLE_SCHEMA, t.TABLE_NAME;
+    SELECT c.TABLE_SCHEMA, c.TABLE_NAME, c.COLUMN_NAME, c.DATA_TYPE, c.CHARACTER_MAXIMUM_LENGTH, c.NUMERIC_PRECISION,
+           c.NUMERIC_SCALE, c.IS_NULLABLE, c.COLUMN_DEFAULT,
+           CASE WHEN pk.COLUMN_NAME IS NOT NULL THEN 'YES' ELSE 'NO' END AS IS_PRIMARY_KEY
+    FROM INFORMATION_SCHEMA.COLUMNS c LEFT JOIN (SELECT ku.TABLE_SCHEMA, ku.TABLE_NAME, ku.COLUMN_NAME
+           FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE ku
+           ON tc.CONSTRAINT_TYPE = 'PRIMARY KEY' AND tc.CONSTRAINT_NAME = ku.CONSTRAINT_NAME AND tc.CONSTRAINT_SCHEMA = ku.CONSTRAINT_SCHEMA
+    ) pk ON c.TABLE_SCHEMA = pk.TABLE_SCHEMA AND c.TABLE_NAME = pk.TABLE_NAME AND c.COLUMN_NAME = pk.COLUMN_NAME
+    WHERE c.TABLE_SCHEMA IN ({schema_placeholders}) ORDER BY c.TABLE_SCHEMA, c.TABLE_NAME, c.ORDINAL_POSITION;
+    SELECT s.name schema_name, fk.name constraint_name, OBJECT_NAME(fk.parent_object_id) table_name,
+           COL_NAME(fkc.parent_object_id, fkc.parent_column_id) column_name,
+           OBJECT_NAME(fk.referenced_object_id) referenced_table_name,
+           COL_NAME(fkc.referenced_object_id, fkc.referenced_column_id) referenced_column_name
+    FROM sys.foreign_keys fk JOIN sys.foreign_key_columns fkc ON fk.OBJECT_ID = fkc.constraint_object_id
+    JOIN sys.tables t ON fk.parent_object_id = t.object_id JOIN sys.schemas s ON t.schema_id = s.schema_id
+    WHERE s.name IN ({schema_placeholders});
+    """
+
+    async def load_all() -> Dict[str, Any]:
+        (t_cols, t_rows), (c_cols, c_rows), (f_cols, f_rows) = await _run_db(
+            _execute_query_multi_blocking, batch_query, tuple(schemas) * 3
+        )
+        tables = [dict(zip(t_cols, row)) for row in t_rows]
+        columns_by_table: Dict[str, List[Dict[str, Any]]] = {
+            f"{t['TABLE_SCHEMA']}.{t['TABLE_NAME']}": [] for t in tables
+        }
+        foreign_keys_by_table: Dict[str, List[Dict[str, Any]]] = {key: [] for key in columns_by_table}
+
+        # Group rows by their leading schema/table columns, keeping the same
+        # per-row shape get_table_schema returns
+        for row in c_rows:
+            table_columns = columns_by_table.get(f"{row[0]}.{row[1]}")
+            if table_columns is not None:
+                table_columns.append(dict(zip(c_cols[2:], row[2:])))
+        for row in f_rows:
+            table_fks = foreign_keys_by_table.get(f"{row[0]}.{row[2]}")
+            if table_fks is not None:
+                table_fks.append(dict(zip(f_cols[1:], row[1:])))
+
+        return {"tables": tables, "columns_by_table": columns_by_table,
+                "foreign_keys_by_table": foreign_keys_by_table}
+
+    try:
+        result = await _cached(
+            ("list_tables_with_schemas", schema, include_views, _ALLOWED_SCHEMAS_PARAMS),
+            DB_META_TTL,
+            load_all
+        )
+        logger.info(f"Retrieved {len(result['tables'])} tables/views with columns and foreign keys")
+        return result
+    except Exception as e:
+         logger.error(f"Error in list_tables_with_schemas handler: {e}")
+         raise ValueError(f"Failed to list tables with schemas: {e}") from e
+
+@json_tool
+async def execute_select(query: str, limit: int = 100, parameters: Optional[Dict[str, Any]] = None,
+                         result_format: str = "rows") -> Dict[str, Any]:
     """
     Execute a safe SELECT query.
     Args:
         query: SQL SELECT query (DML/DDL forbidden).
         limit: Max rows to return (default: 100).
         parameters: Query parameters {name: value} (for ? placeholders in order).
+        result_format: "rows" for one object per row (default), "columnar" for
+            one value list per row in column order, or "by_column" for one
+            value list per column. Both avoid repeating column names in
+            every row, which is much smaller for wide results.
     """
     logger.info(f"Handling execute_select: limit={limit}")
     query_params_dict = parameters if parameters is not None else {}
@@ -296,50 +727,127 @@ async def execute_select(query: str, limit: int = 100, parameters: Optional[Dict
     if not query: raise ValueError("Query parameter is required.")
     if limit < 0: raise ValueError("Limit must be non-negative.")
     if not isinstance(query_params_dict, dict): raise ValueError("Parameters must be a dictionary/object.")
+    if result_format not in ("rows", "columnar", "by_column"):
+        raise ValueError("result_format must be 'rows', 'columnar' or 'by_column'.")
 
     if not is_safe_query(query):
         raise ValueError("Query validation failed. Only SELECT queries are allowed.")
 
     # Apply TOP clause
-    processed_query = query.strip()
-    if limit > 0 and not processed_query.upper().startswith("SELECT TOP "):
-         if processed_query.upper().startswith("SELECT"):
-              processed_query = f"SELECT TOP {limit} " + processed_query[len("SELECT"):].strip()
+    processed_query, query_params = _apply_top(
+        query, limit, tuple(query_params_dict.values()) if query_params_dict else None
+    )
+    cache_key = None
+    if DB_RESULT_TTL > 0:
+        cache_key = (_normalize_query(processed_query), query_params, limit)
+        try:
+            hash(cache_key)
+        except TypeError:
+            # Unhashable parameter values (e.g. lists) are never cached
+            cache_key = None
 
     try:
         start_time = time.monotonic()
-        results = await asyncio.to_thread(
-            _execute_query_blocking,
-            processed_query,
-            tuple(query_params_dict.values()) if query_params_dict else None,
-            max_rows=limit
-        )
+        cached = _result_cache_get(cache_key) if cache_key is not None else None
+        cache_hit = cached is not None
+        if cache_hit:
+            columns, column_types, rows = cached
+        else:
+            columns, column_types, rows = await _run_db(
+                _execute_query_columnar_blocking,
+                processed_query,
+                query_params,
+                max_rows=limit
+            )
+            if cache_key is not None and len(rows) <= _RESULT_CACHE_MAX_ROWS:
+                _result_cache_put(cache_key, (columns, column_types, rows))
         execution_time = time.monotonic() - start_time
 
         # Format response
-        columns_meta = []
-        if results:
-            first_row = results[0]
-            for col_name in first_row.keys():
-                value = first_row[col_name]
-                col_type = type(value).__name__ if value is not None else "unknown"
-                columns_meta.append({"name": col_name, "type": col_type})
+        columns_meta = [{"name": col_name, "type": col_type} for col_name, col_type in zip(columns, column_types)]
+
+        if result_format == "columnar":
+            results = rows
+        elif result_format == "by_column":
+            # Transpose in C; a column with no rows is an empty list
+            results = [list(values) for values in zip(*rows)] if rows else [[] for _ in columns]
+        else:
+            results = [dict(zip(columns, row)) for row in rows]
 
         response = {
             "success": True, 
-            "row_count": len(results), 
+            "row_count": len(rows), 
             "columns": columns_meta,
             "results": results, 
+            "result_format": result_format,
+            "cache_hit": cache_hit,
             "execution_time_seconds": round(execution_time, 3),
             "limit_applied": limit
         }
-        logger.info(f"Query executed successfully: {len(results)} rows in {execution_time:.3f}s")
+        logger.info(f"Query executed successfully: {len(rows)} rows in {execution_time:.3f}s")
         return response
     except Exception as e:
          logger.error(f"Error in execute_select handler: {e}")
          raise ValueError(f"Failed to execute query: {e}") from e
 
-@mcp.tool()
+async def execute_select_stream(query: str, limit: int = 0, parameters: Optional[Dict[str, Any]] = None,
+                                chunk_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Execute a safe SELECT query, yielding its rows in chunks.
+    The first item carries the column names, each following item up to
+    chunk_size rows as value lists, and the last one the row count and
+    timing. Peak memory is one chunk rather than the whole result, at the
+    cost of holding a pooled connection until the stream is consumed.
+    Args:
+        query: SQL SELECT query (DML/DDL forbidden).
+        limit: Max rows to return (default: 0, no limit).
+        parameters: Query parameters {name: value} (for ? placeholders in order).
+        chunk_size: Rows per yielded chunk (default: 500).
+    """
+    logger.info(f"Handling execute_select_stream: limit={limit}, chunk_size={chunk_size}")
+    query_params_dict = parameters if parameters is not None else {}
+
+    if not query: raise ValueError("Query parameter is required.")
+    if limit < 0: raise ValueError("Limit must be non-negative.")
+    if chunk_size <= 0: raise ValueError("chunk_size must be positive.")
+    if not isinstance(query_params_dict, dict): raise ValueError("Parameters must be a dictionary/object.")
+
+    if not is_safe_query(query):
+        raise ValueError("Query validation failed. Only SELECT queries are allowed.")
+
+    processed_query, query_params = _apply_top(
+        query, limit, tuple(query_params_dict.values()) if query_params_dict else None
+    )
+    chunks = _iter_query_chunks_blocking(processed_query, query_params, chunk_size)
+
+    # Chunks are pulled on the default executor: a stream keeps its pooled
+    # connection between chunks, and resuming it must never wait behind
+    # _DB_EXEC threads that are themselves waiting for a free connection
+    start_time = time.monotonic()
+    row_count = 0
+    try:
+        chunk = await asyncio.to_thread(next, chunks, None)
+        if chunk is not None:
+            yield {"columns": chunk[0]}
+        while chunk is not None:
+            row_count += len(chunk[1])
+            yield {"rows": chunk[1]}
+            chunk = await asyncio.to_thread(next, chunks, None)
+    except pyodbc.Error as db_err:
+        logger.error(f"Error in execute_select_stream: {db_err}")
+        raise ValueError(f"Failed to execute query: {db_err}") from db_err
+    finally:
+        # Releases the cursor and pooled connection if the consumer stopped early
+        await asyncio.to_thread(chunks.close)
+
+    execution_time = time.monotonic() - start_time
+    logger.info(f"Query streamed successfully: {row_count} rows in {execution_time:.3f}s")
+    yield {"success": True, "row_count": row_count, "execution_time_seconds": round(execution_time, 3)}
+
+# Picked up by direct_server to answer {"stream": true} calls as NDJSON
+execute_select.stream = execute_select_stream
+
+@json_tool
 async def find_foreign_keys(table_name: str) -> List[Dict[str, Any]]:
     """Find foreign key relationships for a table."""
     logger.info(f"Handling find_foreign_keys: table_name={table_name}")
@@ -348,27 +856,43 @@ async def find_foreign_keys(table_name: str) -> List[Dict[str, Any]]:
     parts = table_name.split('.')
     schema_name, table_name_only = (parts[0], parts[1]) if len(parts) == 2 else ('dbo', parts[0])
     
-    if schema_name not in ALLOWED_SCHEMAS:
+    if schema_name not in _ALLOWED_SCHEMAS_SET:
         raise ValueError(f"Schema '{schema_name}' is not allowed.")
     
-    # Query for foreign keys
+    # Query for foreign keys, with the referenced columns' types joined in
+    # so callers don't need a get_table_schema call per referenced table
     fk_query = """
+    WITH fks AS (
+        SELECT 
+            fk.name AS constraint_name,
+            OBJECT_NAME(fk.parent_object_id) AS table_name,
+            COL_NAME(fkc.parent_object_id, fkc.parent_column_id) AS column_name,
+            OBJECT_SCHEMA_NAME(fk.referenced_object_id) AS referenced_schema_name,
+            OBJECT_NAME(fk.referenced_object_id) AS referenced_table_name,
+            COL_NAME(fkc.referenced_object_id, fkc.referenced_column_id) AS referenced_column_name
+        FROM sys.foreign_keys fk 
+        JOIN sys.foreign_key_columns fkc ON fk.OBJECT_ID = fkc.constraint_object_id
+        JOIN sys.tables t ON fk.parent_object_id = t.object_id 
+        JOIN sys.schemas s ON t.schema_id = s.schema_id
+        WHERE s.name = ? AND OBJECT_NAME(fk.parent_object_id) = ?
+    )
     SELECT 
-        fk.name AS constraint_name,
-        OBJECT_NAME(fk.parent_object_id) AS table_name,
-        COL_NAME(fkc.parent_object_id, fkc.parent_column_id) AS column_name,
-        OBJECT_NAME(fk.referenced_object_id) AS referenced_table_name,
-        COL_NAME(fkc.referenced_object_id, fkc.referenced_column_id) AS referenced_column_name
-    FROM sys.foreign_keys fk 
-    JOIN sys.foreign_key_columns fkc ON fk.OBJECT_ID = fkc.constraint_object_id
-    JOIN sys.tables t ON fk.parent_object_id = t.object_id 
-    JOIN sys.schemas s ON t.schema_id = s.schema_id
-    WHERE s.name = ? AND OBJECT_NAME(fk.parent_object_id) = ?
+        f.constraint_name, f.table_name, f.column_name,
+        f.referenced_table_name, f.referenced_column_name, f.referenced_schema_name,
+        c.DATA_TYPE AS referenced_data_type,
+        c.CHARACTER_MAXIMUM_LENGTH AS referenced_max_length
+    FROM fks f
+    LEFT JOIN INFORMATION_SCHEMA.COLUMNS c
+        ON c.TABLE_SCHEMA = f.referenced_schema_name
+        AND c.TABLE_NAME = f.referenced_table_name
+        AND c.COLUMN_NAME = f.referenced_column_name
     """
     
     try:
-        foreign_keys = await asyncio.to_thread(
-            _execute_query_blocking, fk_query, (schema_name, table_name_only)
+        foreign_keys = await _cached(
+            ("find_foreign_keys", schema_name, table_name_only),
+            DB_META_TTL,
+            lambda: _run_db(_execute_query_blocking, fk_query, (schema_name, table_name_only), reuse_cursor=True)
         )
         logger.info(f"Retrieved {len(foreign_keys)} foreign keys for {schema_name}.{table_name_only}")
         return foreign_keys
@@ -376,6 +900,34 @@ async def find_foreign_keys(table_name: str) -> List[Dict[str, Any]]:
         logger.error(f"Error in find_foreign_keys handler: {e}")
         raise ValueError(f"Failed to find foreign keys: {e}") from e
 
+@json_tool
+async def refresh_metadata() -> Dict[str, Any]:
+    """
+    Clear cached table, column and foreign key metadata.
+    Use after schema changes so the next lookups read the catalog again.
+    """
+    with _METADATA_CACHE_LOCK:
+        cleared = len(_METADATA_CACHE)
+        _METADATA_CACHE.clear()
+    # The analyze tools keep their own per-table cache
+    analyze = sys.modules.get("src.sqlmcp.tools.analyze_fixed")
+    if analyze is not None:
+        cleared += analyze.invalidate_table_meta()
+    logger.info(f"Cleared {cleared} cached metadata entries")
+    return {"success": True, "cleared_entries": cleared}
+
+@json_tool
+async def clear_query_cache() -> Dict[str, Any]:
+    """
+    Clear cached execute_select results.
+    Use after data changes so the next queries read the database again.
+    """
+    with _RESULT_CACHE_LOCK:
+        cleared = len(_RESULT_CACHE)
+        _RESULT_CACHE.clear()
+    logger.info(f"Cleared {cleared} cached query results")
+    return {"success": True, "cleared_entries": cleared}
+
 if __name__ == "__main__":
     logger.info("Starting SQL MCP Server with All Tools (FastMCP Version)")
     logger.info(f"Using DB: {DB_SERVER}/{DB_NAME}")
@@ -391,7 +943,8 @@ if __name__ == "__main__":
         db_connection_blocking=_get_db_connection_blocking,
         execute_query_blocking=_execute_query_blocking,
         allowed_schemas=ALLOWED_SCHEMAS,
-        is_safe_query=is_safe_query
+        is_safe_query=is_safe_query,
+        acquire_connection_blocking=_POOL.acquire
     )
     
     if not success:
@@ -434,6 +987,7 @@ if __name__ == "__main__":
          sys.exit(1)
     finally:
          logger.info("FastMCP server stopped.")
+         close_connection_pool()
          if _conn:
              try: 
                  _conn.close()
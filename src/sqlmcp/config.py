@@ -1,14 +1,19 @@
 """
 Configuration management for the SQL MCP server.
 """
-from pydantic_settings import BaseSettings
-from pydantic import Field, validator
+from pydantic_settings import BaseSettings, NoDecode
+from pydantic import AliasChoices, Field, validator
 from typing import Optional, Dict, Any, List
-import os
+from typing_extensions import Annotated
 import sys
-import json
 import logging
 
+try:
+    import orjson as _json
+except ImportError:  # orjson is optional here; stdlib json parses the same input
+    import json as _json
+from functools import lru_cache
+
 logger = logging.getLogger(__name__)
 
 # Default configuration values - can be overridden by environment variables
@@ -16,50 +21,53 @@ DEFAULT_SQL_SERVER = "localhost"
 DEFAULT_SQL_DATABASE = "database"
 DEFAULT_SQL_AUTH_METHOD = "sql"
 
+def _env(name: str) -> AliasChoices:
+    """Environment names for a setting, in priority order: SQLMCP_, DB_USER_, unprefixed."""
+    return AliasChoices(f"SQLMCP_{name}", f"DB_USER_{name}", name)
+
 class Settings(BaseSettings):
     """Application settings with validation."""
     
     # Database connection settings - configurable via environment variables
-    db_server: str = Field(DEFAULT_SQL_SERVER, description="SQL Server hostname or IP")
-    db_name: str = Field(DEFAULT_SQL_DATABASE, description="Database name")
-    auth_method: str = Field(DEFAULT_SQL_AUTH_METHOD, description="Authentication method: 'sql' or 'windows'")
+    db_server: str = Field(DEFAULT_SQL_SERVER, description="SQL Server hostname or IP", validation_alias=_env("DB_SERVER"))
+    db_name: str = Field(DEFAULT_SQL_DATABASE, description="Database name", validation_alias=_env("DB_NAME"))
+    auth_method: str = Field(DEFAULT_SQL_AUTH_METHOD, description="Authentication method: 'sql' or 'windows'", validation_alias=_env("AUTH_METHOD"))
     
     # Configurable credentials - Must be provided via environment variables
-    db_username: str = Field(..., description="Database username (for SQL auth)")
-    db_password: str = Field(..., description="Database password (for SQL auth)")
+    db_username: str = Field(..., description="Database username (for SQL auth)", validation_alias=_env("DB_USERNAME"))
+    db_password: str = Field(..., description="Database password (for SQL auth)", validation_alias=_env("DB_PASSWORD"))
     
     # Connection settings
-    connection_timeout: int = Field(30, description="Connection timeout in seconds")
-    connection_pool_size: int = Field(5, description="Size of connection pool")
+    connection_timeout: int = Field(30, description="Connection timeout in seconds", validation_alias=_env("CONNECTION_TIMEOUT"))
+    connection_pool_size: int = Field(5, description="Size of connection pool", validation_alias=_env("CONNECTION_POOL_SIZE"))
+    connection_pool_max: int = Field(20, description="Maximum open connections for blocking queries", validation_alias=_env("CONNECTION_POOL_MAX"))
     
     # Server settings
-    host: str = Field("127.0.0.1", description="Host to bind server to")
-    port: int = Field(8000, description="Port to bind server to")
-    debug: bool = Field(False, description="Enable debug mode")
+    host: str = Field("127.0.0.1", description="Host to bind server to", validation_alias=_env("HOST"))
+    port: int = Field(8000, description="Port to bind server to", validation_alias=_env("PORT"))
+    debug: bool = Field(False, description="Enable debug mode", validation_alias=_env("DEBUG"))
     
     # Security settings
-    allowed_schemas: List[str] = Field(default_factory=lambda: ["dbo"], description="Allowed database schemas")
-    max_rows: int = Field(1000, description="Maximum rows to return from a query")
-    query_timeout: int = Field(30, description="Query timeout in seconds")
-    read_only: bool = Field(True, description="Allow only read operations")
+    allowed_schemas: Annotated[List[str], NoDecode] = Field(default_factory=lambda: ["dbo"], description="Allowed database schemas", validation_alias=_env("ALLOWED_SCHEMAS"))
+    max_rows: int = Field(1000, description="Maximum rows to return from a query", validation_alias=_env("MAX_ROWS"))
+    query_timeout: int = Field(30, description="Query timeout in seconds", validation_alias=_env("QUERY_TIMEOUT"))
+    read_only: bool = Field(True, description="Allow only read operations", validation_alias=_env("READ_ONLY"))
+    mock_mode: bool = Field(False, description="Use simulated connections and results instead of a database", validation_alias=_env("MOCK_MODE"))
     
     # Logging settings
-    log_level: str = Field("INFO", description="Logging level")
+    log_level: str = Field("INFO", description="Logging level", validation_alias=_env("LOG_LEVEL"))
     log_format: str = Field(
         "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        description="Log format string"
+        description="Log format string",
+        validation_alias=_env("LOG_FORMAT")
     )
     
-    class Config:
-        """Pydantic configuration."""
-        # No env_prefix - we'll handle this in model_config to support multiple prefixes
-        env_file = ".env"  # Enable .env file loading
-        env_file_encoding = "utf-8"
-        
+    # No env_prefix - each field lists its prefixed names via validation_alias
     model_config = {
         "env_nested_delimiter": "__",
-        "env_file": ".env",
+        "env_file": ".env",  # Enable .env file loading
         "env_file_encoding": "utf-8",
+        "populate_by_name": True,
     }
         
     @validator("auth_method")
@@ -83,62 +91,32 @@ class Settings(BaseSettings):
         if isinstance(v, str):
             try:
                 # Try to parse as JSON
-                parsed = json.loads(v)
+                parsed = _json.loads(v)
                 if isinstance(parsed, list):
                     return parsed
                 else:
                     logger.warning(f"Invalid JSON for allowed_schemas: {v}, using default")
                     return ["dbo"]
-            except json.JSONDecodeError:
+            except ValueError:  # JSONDecodeError from either parser
                 # Try to parse as comma-separated string
                 return [s.strip() for s in v.split(",")]
         elif v is None:
             return ["dbo"]  # Default
         return v
 
-def get_env_var(name: str, default=None) -> Any:
-    """Get environment variable with both SQLMCP_ and DB_USER_ prefix support."""
-    # Try SQLMCP_ prefix first (new standard)
-    value = os.environ.get(f"SQLMCP_{name}", None)
-    
-    # Fall back to DB_USER_ prefix if SQLMCP_ not found
-    if value is None:
-        value = os.environ.get(f"DB_USER_{name}", default)
-        
-    return value
-
+@lru_cache(maxsize=1)
 def load_settings() -> Optional[Settings]:
-    """Load and validate application settings with multi-prefix support."""
+    """Load and validate application settings with multi-prefix support.
+    
+    Settings are parsed once per process; later calls return the same object.
+    """
     try:
-        # Set environment variables with prefix priority: SQLMCP_ > DB_USER_
-        # This ensures pydantic settings can find the variables without prefixes
-        for env_var in [
-            "DB_SERVER", "DB_NAME", "DB_USERNAME", "DB_PASSWORD", 
-            "ALLOWED_SCHEMAS", "HOST", "PORT", "DEBUG", "LOG_LEVEL", 
-            "CONNECTION_TIMEOUT", "CONNECTION_POOL_SIZE", "AUTH_METHOD",
-            "MAX_ROWS", "QUERY_TIMEOUT", "READ_ONLY"
-        ]:
-            value = get_env_var(env_var)
-            if value is not None:
-                # Set the environment variable without prefix for pydantic to find
-                os.environ[env_var] = value
-                
-        # Handle ALLOWED_SCHEMAS specifically since it needs special parsing
-        schemas_str = get_env_var("ALLOWED_SCHEMAS")
-        if schemas_str:
-            try:
-                json.loads(schemas_str)  # Validate it's proper JSON
-                os.environ["ALLOWED_SCHEMAS"] = schemas_str
-            except Exception:
-                logger.warning(f"Invalid ALLOWED_SCHEMAS format: {schemas_str}. Using default.")
-                os.environ["ALLOWED_SCHEMAS"] = '["dbo"]'
-        else:
-            os.environ["ALLOWED_SCHEMAS"] = '["dbo"]'
-            
+        # Each field reads SQLMCP_, DB_USER_ or unprefixed names directly
         settings = Settings()
-        logger.info(f"Loaded configuration for database {settings.db_name} on {settings.db_server}")
-        logger.info(f"Allowed database schemas: {settings.allowed_schemas}")
-        logger.info(f"Using SQL auth with username: {settings.db_username}")
+        logger.info(
+            "Loaded configuration for database %s on %s | schemas=%s | user=%s",
+            settings.db_name, settings.db_server, settings.allowed_schemas, settings.db_username
+        )
         
         return settings
     except Exception as e:
@@ -146,7 +124,8 @@ def load_settings() -> Optional[Settings]:
         logger.error(error_msg)
         
         # More detailed error message for missing credentials
-        if "db_username" in str(e) or "db_password" in str(e):
+        # Missing fields are reported under their first alias, e.g. SQLMCP_DB_USERNAME
+        if "db_username" in str(e).lower() or "db_password" in str(e).lower():
             cred_error = (
                 "SQL credentials not found. Make sure to provide username and password "
                 "via environment variables (SQLMCP_DB_USERNAME/SQLMCP_DB_PASSWORD or "
@@ -3,5 +3,6 @@ Database module initialization.
 """
 
 from DB_USER.db.connection import DBConnectionPool
+from DB_USER.db.pool import BlockingConnectionPool
 
-__all__ = ['DBConnectionPool']
+__all__ = ['DBConnectionPool', 'BlockingConnectionPool']
@@ -3,14 +3,38 @@ Database connection pool management.
 """
 import asyncio
 import logging
+import re
 import time
-from typing import Dict, Any, Optional, List
+from functools import partial
+from typing import Dict, Any, Optional, List, Tuple
+
+try:
+    import pyodbc
+    # pyodbc's own driver-manager pooling would sit underneath this pool
+    pyodbc.pooling = False
+except ImportError:  # Only needed outside mock mode
+    pyodbc = None
+
+from DB_USER.db.pool import build_connection_string
+from DB_USER.utils.security import is_safe_query
 
 logger = logging.getLogger(__name__)
 
+# Prefix check for SELECT statements, without copying the whole query
+_SELECT_RE = re.compile(r"^\s*select\b", re.IGNORECASE)
+
 class DBConnectionPool:
     """Manages a pool of database connections with monitoring and health checks."""
     
+    __slots__ = (
+        "server", "database", "authentication", "username", "password",
+        "pool_size", "timeout", "_conn_str", "mock_mode",
+        "batch_max", "batch_max_wait_ms", "_batch_queue", "_batch_workers",
+        "_idle", "_in_use", "_created", "_init_lock", "initialized",
+        "connection_attempts", "successful_connections", "failed_connections",
+        "queries_executed", "last_error",
+    )
+    
     def __init__(
         self,
         server: str,
@@ -20,6 +44,9 @@ class DBConnectionPool:
         password: Optional[str] = None,
         pool_size: int = 5,
         timeout: int = 30,
+        mock_mode: bool = False,
+        batch_max: int = 8,
+        batch_max_wait_ms: float = 2.0,
     ):
         self.server = server
         self.database = database
@@ -29,9 +56,26 @@ class DBConnectionPool:
         self.pool_size = pool_size
         self.timeout = timeout
         
-        self.pool = []
-        self.in_use = {}
-        self.lock = asyncio.Lock()
+        # Construct connection string based on authentication method
+        self._conn_str = build_connection_string(server, database, authentication, username, password)
+        # Mock mode hands out placeholder connections and canned results
+        # with simulated latency, for running without a database
+        self.mock_mode = mock_mode
+        # Concurrent SELECTs are queued and sent to the server as one batch
+        # of up to batch_max statements, waiting at most batch_max_wait_ms
+        # for a batch to fill; batch_max <= 1 disables batching
+        self.batch_max = batch_max
+        self.batch_max_wait_ms = batch_max_wait_ms
+        self._batch_queue: asyncio.Queue = asyncio.Queue()
+        self._batch_workers: List[asyncio.Task] = []
+        
+        # Idle connections wait in a queue, so acquiring and releasing take no
+        # lock; the lock only serializes warmup and close. Connections are
+        # opened on demand, _created counting those currently open.
+        self._idle: asyncio.Queue = asyncio.Queue(maxsize=pool_size)
+        self._in_use = 0
+        self._created = 0
+        self._init_lock = asyncio.Lock()
         self.initialized = False
         
         # Connection metrics
@@ -42,166 +86,362 @@ class DBConnectionPool:
         self.last_error = None
     
     async def initialize(self) -> None:
-        """Initialize the connection pool."""
-        async with self.lock:
-            if self.initialized:
+        """Initialize the connection pool.
+        
+        Connections are opened lazily by get_connection, so this only marks
+        the pool ready; use warmup() to open them ahead of time. Batch
+        workers, one per pooled connection, are started here.
+        """
+        if not self.mock_mode and self.batch_max > 1 and not self._batch_workers:
+            self._batch_workers = [
+                asyncio.create_task(self._batch_worker()) for _ in range(self.pool_size)
+            ]
+        self.initialized = True
+        logger.info("Initialized connection pool (up to %s pooled connections)", self.pool_size)
+    
+    async def warmup(self) -> None:
+        """Open connections concurrently until pool_size are idle or in use.
+        
+        Raises ConnectionError summarizing any connections that failed to
+        open; the ones that did open are kept.
+        """
+        async with self._init_lock:
+            missing = self.pool_size - self._created
+            if missing <= 0:
                 return
             
-            for _ in range(self.pool_size):
+            results = await asyncio.gather(
+                *[self._open_connection() for _ in range(missing)],
+                return_exceptions=True
+            )
+            failures = [r for r in results if isinstance(r, BaseException)]
+            for conn in results:
+                if isinstance(conn, BaseException):
+                    continue
                 try:
-                    conn = await self._create_connection()
-                    self.pool.append(conn)
-                    self.successful_connections += 1
-                except Exception as e:
-                    self.failed_connections += 1
-                    self.last_error = str(e)
-                    logger.error(f"Failed to create connection: {str(e)}")
-                    raise
+                    self._idle.put_nowait(conn)
+                except asyncio.QueueFull:
+                    # Released connections filled the pool meanwhile
+                    self._discard(conn)
             
-            self.initialized = True
-            logger.info(f"Initialized connection pool with {len(self.pool)} connections")
+            logger.info("Warmed up connection pool with %s idle connections", self._idle.qsize())
+            if failures:
+                raise ConnectionError(
+                    f"{len(failures)} of {missing} connections failed to open: {failures[0]}"
+                )
+    
+    async def _open_connection(self):
+        """Create a connection, counting it against the pool limit and metrics."""
+        self._created += 1
+        try:
+            conn = await self._create_connection()
+        except Exception as e:
+            self._created -= 1
+            self.failed_connections += 1
+            self.last_error = str(e)
+            logger.error("Failed to create connection: %s", e)
+            raise
+        self.successful_connections += 1
+        return conn
     
     async def _create_connection(self):
         """Create a new database connection."""
         self.connection_attempts += 1
         
-        # Construct connection string based on authentication method
-        if self.authentication == "windows":
-            conn_str = f"Driver={{SQL Server}};Server={self.server};Database={self.database};Trusted_Connection=yes;"
+        if self.mock_mode:
+            conn = {"connection_string": self._conn_str, "created_at": time.time()}
         else:
-            conn_str = f"Driver={{SQL Server}};Server={self.server};Database={self.database};UID={self.username};PWD={self.password};"
-        
-        # Create connection (wrapped in asyncio to make non-blocking)
-        # Note: In a real implementation, you would import pyodbc or pymssql here
-        # For this framework, we're just creating a placeholder
-        loop = asyncio.get_event_loop()
+            # Create connection (wrapped in asyncio to make non-blocking)
+            if pyodbc is None:
+                raise ImportError("pyodbc is required unless mock_mode is enabled")
+            loop = asyncio.get_running_loop()
+            conn = await loop.run_in_executor(
+                None, partial(pyodbc.connect, self._conn_str, autocommit=True, timeout=self.timeout)
+            )
         
-        # Mock connection creation - replace with actual pyodbc in real implementation
-        # conn = await loop.run_in_executor(None, lambda: pyodbc.connect(conn_str))
-        conn = {"connection_string": conn_str, "created_at": time.time()}
-        
-        logger.debug(f"Created new connection to {self.server}/{self.database}")
+        logger.debug("Created new connection to %s/%s", self.server, self.database)
         return conn
     
     async def get_connection(self):
         """Get a connection from the pool or create a new one if needed."""
-        async with self.lock:
-            if not self.initialized:
-                await self.initialize()
-            
-            if not self.pool:
-                # No available connections, create a new one if under limit
-                if len(self.in_use) < self.pool_size * 2:  # Allow creating up to 2x pool size
-                    conn = await self._create_connection()
-                    conn_id = id(conn)
-                    self.in_use[conn_id] = (conn, time.time())
-                    return conn
-                else:
-                    # Wait for a connection to become available
-                    raise TimeoutError("No available connections in the pool")
+        if not self.initialized:
+            await self.initialize()
+        
+        try:
+            conn = self._idle.get_nowait()
+        except asyncio.QueueEmpty:
+            # No available connections, create a new one if under limit
+            if self._created < self.pool_size * 2:  # Allow creating up to 2x pool size
+                conn = await self._open_connection()
+                self._in_use += 1
+                return conn
             
-            # Get connection from pool
-            conn = self.pool.pop(0)
-            conn_id = id(conn)
-            self.in_use[conn_id] = (conn, time.time())
-            return conn
+            # Wait for a connection to become available; waiters are
+            # served in FIFO order
+            try:
+                conn = await asyncio.wait_for(self._idle.get(), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError("No available connections in the pool")
+        
+        self._in_use += 1
+        return conn
     
     async def release_connection(self, conn) -> None:
         """Return a connection to the pool."""
-        conn_id = id(conn)
-        async with self.lock:
-            if conn_id in self.in_use:
-                del self.in_use[conn_id]
-                
-                # Check if connection is still valid
-                try:
-                    # In a real implementation, this would execute a test query
-                    # cursor = conn.cursor()
-                    # cursor.execute("SELECT 1")
-                    # cursor.fetchall()
-                    # cursor.close()
-                    self.pool.append(conn)
-                except Exception as e:
-                    logger.warning(f"Discarding broken connection: {str(e)}")
-                    # try:
-                    #     conn.close()
-                    # except:
-                    #     pass
+        self._in_use = max(self._in_use - 1, 0)
+        
+        # Check if connection is still valid
+        try:
+            # In a real implementation, this would execute a test query
+            # cursor = conn.cursor()
+            # cursor.execute("SELECT 1")
+            # cursor.fetchall()
+            # cursor.close()
+            self._idle.put_nowait(conn)
+        except asyncio.QueueFull:
+            # Overflow connection beyond pool_size; drop it
+            self._discard(conn)
+        except Exception as e:
+            logger.warning("Discarding broken connection: %s", e)
+            self._discard(conn)
+    
+    def _discard(self, conn) -> None:
+        """Close a connection that is leaving the pool and stop counting it."""
+        self._created -= 1
+        if self.mock_mode:
+            return
+        try:
+            conn.close()
+        except Exception as e:
+            logger.warning("Error closing connection: %s", e)
     
     async def execute_query(self, query: str, params: Optional[Dict[str, Any]] = None, 
                            timeout: Optional[int] = None) -> List[Dict[str, Any]]:
         """Execute a query and return results as list of dictionaries."""
+        if not self.initialized:
+            await self.initialize()
+        
+        if self._batch_workers and timeout is None and self._is_batchable(query):
+            future = asyncio.get_running_loop().create_future()
+            self._batch_queue.put_nowait((query, params, future))
+            return await future
+        
         conn = await self.get_connection()
         try:
-            # Set timeout if specified
-            # if timeout:
-            #     conn.timeout = timeout
-            
-            # cursor = conn.cursor()
-            
             start_time = time.time()
-            # if params:
-            #     cursor.execute(query, params)
-            # else:
-            #     cursor.execute(query)
-            
-            # Mock execution
-            # In a real implementation, this would be the actual query execution
-            await asyncio.sleep(0.1)  # Simulate query execution time
-            
-            # Mock results
-            # In a real implementation, this would fetch results from the cursor
-            if "SELECT" in query.upper():
+            if self.mock_mode:
+                await asyncio.sleep(0.1)  # Simulate query execution time
+                
                 # Simulate query results
-                columns = ["id", "name", "value"]
-                results = [
-                    {"id": 1, "name": "Test 1", "value": 100},
-                    {"id": 2, "name": "Test 2", "value": 200}
-                ]
+                if _SELECT_RE.match(query):
+                    results = [
+                        {"id": 1, "name": "Test 1", "value": 100},
+                        {"id": 2, "name": "Test 2", "value": 200}
+                    ]
+                else:
+                    results = []
             else:
-                results = []
+                loop = asyncio.get_running_loop()
+                results = await loop.run_in_executor(None, self._execute_sync, conn, query, params, timeout)
             
             execution_time = time.time() - start_time
-            logger.debug(f"Query executed in {execution_time:.3f}s, returned {len(results)} rows")
+            logger.debug("Query executed in %.3fs, returned %s rows", execution_time, len(results))
             
             self.queries_executed += 1
             return results
         except Exception as e:
             self.last_error = str(e)
-            logger.error(f"Query execution error: {str(e)}")
+            logger.error("Query execution error: %s", e)
             raise
         finally:
             await self.release_connection(conn)
     
+    def _execute_sync(self, conn, query: str, params: Optional[Dict[str, Any]],
+                      timeout: Optional[int]) -> List[Dict[str, Any]]:
+        """Run a query on a pyodbc connection (blocking) and fetch all rows."""
+        # Set timeout if specified; restored afterwards so it doesn't stick
+        # to the pooled connection
+        previous_timeout = conn.timeout
+        if timeout:
+            conn.timeout = timeout
+        cursor = conn.cursor()
+        try:
+            if params:
+                cursor.execute(query, tuple(params.values()) if isinstance(params, dict) else params)
+            else:
+                cursor.execute(query)
+            if not cursor.description:
+                return []
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            if timeout:
+                conn.timeout = previous_timeout
+    
+    @staticmethod
+    def _is_batchable(query: str) -> bool:
+        """Only side-effect-free single SELECTs may share a batch."""
+        return bool(_SELECT_RE.match(query)) and is_safe_query(query)
+    
+    async def _batch_worker(self) -> None:
+        """Collect queued queries into batches and run each batch on one connection."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._batch_queue.get()]
+            deadline = loop.time() + self.batch_max_wait_ms / 1000
+            while len(batch) < self.batch_max:
+                try:
+                    batch.append(self._batch_queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._batch_queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Callers that were cancelled while queued no longer need results
+            batch = [item for item in batch if not item[2].done()]
+            if not batch:
+                continue
+            try:
+                await self._run_batch(batch)
+            except asyncio.CancelledError:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(ConnectionError("Connection pool closed"))
+                raise
+    
+    async def _run_batch(self, batch: List[Tuple[str, Optional[Dict[str, Any]], asyncio.Future]]) -> None:
+        """Execute a batch and resolve each caller's future with its own result set."""
+        loop = asyncio.get_running_loop()
+        try:
+            conn = await self.get_connection()
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        try:
+            start_time = time.time()
+            try:
+                results = await loop.run_in_executor(None, self._execute_batch_sync, conn, batch)
+            except Exception as e:
+                if len(batch) == 1:
+                    raise
+                # One statement failed the whole batch; rerun them separately
+                # so only the failing caller sees the error
+                logger.debug("Batch of %s queries failed, retrying individually: %s", len(batch), e)
+                for query, params, future in batch:
+                    try:
+                        rows = await loop.run_in_executor(None, self._execute_sync, conn, query, params, None)
+                    except Exception as query_error:
+                        self.last_error = str(query_error)
+                        if not future.done():
+                            future.set_exception(query_error)
+                    else:
+                        self.queries_executed += 1
+                        if not future.done():
+                            future.set_result(rows)
+                return
+            
+            execution_time = time.time() - start_time
+            logger.debug("Batch of %s queries executed in %.3fs", len(batch), execution_time)
+            
+            self.queries_executed += len(batch)
+            for (_, _, future), rows in zip(batch, results):
+                if not future.done():
+                    future.set_result(rows)
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error("Query execution error: %s", e)
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            await self.release_connection(conn)
+    
+    def _execute_batch_sync(self, conn, batch) -> List[List[Dict[str, Any]]]:
+        """Run several SELECTs as one T-SQL batch (blocking), one result set each."""
+        if len(batch) == 1:
+            query, params, _ = batch[0]
+            return [self._execute_sync(conn, query, params, None)]
+        
+        statements = []
+        args: List[Any] = []
+        for query, params, _ in batch:
+            statements.append(query.strip().rstrip(";"))
+            if params:
+                args.extend(params.values() if isinstance(params, dict) else params)
+        
+        cursor = conn.cursor()
+        try:
+            if args:
+                cursor.execute(";\n".join(statements), args)
+            else:
+                cursor.execute(";\n".join(statements))
+            results = []
+            while True:
+                if cursor.description:
+                    columns = [column[0] for column in cursor.description]
+                    results.append([dict(zip(columns, row)) for row in cursor.fetchall()])
+                else:
+                    results.append([])
+                if not cursor.nextset():
+                    break
+        finally:
+            cursor.close()
+        
+        if len(results) != len(batch):
+            raise RuntimeError(f"Batch returned {len(results)} result sets for {len(batch)} queries")
+        return results
+    
     async def close(self) -> None:
         """Close all connections in the pool."""
-        async with self.lock:
-            # Close all pool connections
-            for conn in self.pool:
-                try:
-                    # conn.close()
-                    pass  # In a real implementation, this would close connections
-                except Exception as e:
-                    logger.warning(f"Error closing connection: {str(e)}")
+        async with self._init_lock:
+            # Stop batching and fail anything still queued
+            for task in self._batch_workers:
+                task.cancel()
+            if self._batch_workers:
+                await asyncio.gather(*self._batch_workers, return_exceptions=True)
+            self._batch_workers = []
+            while not self._batch_queue.empty():
+                _, _, future = self._batch_queue.get_nowait()
+                if not future.done():
+                    future.set_exception(ConnectionError("Connection pool closed"))
             
-            # Close all in-use connections
-            for conn_id, (conn, _) in self.in_use.items():
-                try:
-                    # conn.close()
-                    pass  # In a real implementation, this would close connections
-                except Exception as e:
-                    logger.warning(f"Error closing connection: {str(e)}")
+            # Close all idle pool connections. Checked-out connections aren't
+            # tracked individually; they come back through release_connection.
+            conns = []
+            while not self._idle.empty():
+                conns.append(self._idle.get_nowait())
+            self._created -= len(conns)
+            
+            # Close them in parallel so a slow server costs one timeout, not one each
+            if conns and not self.mock_mode:
+                loop = asyncio.get_running_loop()
+                results = await asyncio.gather(
+                    *[loop.run_in_executor(None, conn.close) for conn in conns],
+                    return_exceptions=True
+                )
+                for result in results:
+                    if isinstance(result, BaseException):
+                        logger.warning("Error closing connection: %s", result)
             
-            self.pool = []
-            self.in_use = {}
+            self._in_use = 0
             self.initialized = False
             logger.info("Connection pool closed")
     
     async def health_check(self) -> Dict[str, Any]:
         """Return health status of the connection pool."""
         return {
-            "pool_size": len(self.pool),
-            "in_use": len(self.in_use),
+            "pool_size": self._idle.qsize(),
+            "in_use": self._in_use,
             "connection_attempts": self.connection_attempts,
             "successful_connections": self.successful_connections,
             "failed_connections": self.failed_connections,
@@ -0,0 +1,111 @@
+"""
+Blocking pyodbc connection pool for the synchronous query helpers.
+"""
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+try:
+    import pyodbc
+    _DB_ERRORS = (pyodbc.Error,)
+except ImportError:  # Only needed once a connection is opened
+    pyodbc = None
+    _DB_ERRORS = ()
+
+logger = logging.getLogger(__name__)
+
+# Microsoft ODBC driver attribute that makes the next statement on the
+# connection run sp_reset_connection first (temp tables, SET options, ...)
+_SQL_COPT_SS_RESET_CONNECTION = 1204
+_SQL_RESET_CONNECTION_YES = 1
+
+# SQLSTATEs meaning the connection itself is gone rather than the statement
+# having failed
+_DISCONNECT_SQLSTATES = frozenset({"08S01", "08003"})
+
+def _is_disconnected(error: Exception) -> bool:
+    """Whether a driver error reports a lost connection."""
+    return bool(error.args) and error.args[0] in _DISCONNECT_SQLSTATES
+
+def build_connection_string(server: str, database: str, authentication: str = "sql",
+                            username: Optional[str] = None, password: Optional[str] = None) -> str:
+    """Build the ODBC connection string for an authentication method."""
+    if authentication == "windows":
+        return f"Driver={{SQL Server}};Server={server};Database={database};Trusted_Connection=yes;"
+    return f"Driver={{SQL Server}};Server={server};Database={database};UID={username};PWD={password};"
+
+class BlockingConnectionPool:
+    """Bounded pool of pyodbc connections for code running in worker threads.
+
+    Up to pool_size idle connections are kept in a queue; at most max_size
+    are open at once, further callers wait for a free one. Connections are
+    opened lazily, given query_timeout as their statement timeout, and have
+    their session state reset when they are returned.
+    """
+
+    def __init__(self, connect: Callable[[], Any], pool_size: int = 5, max_size: int = 20,
+                 query_timeout: Optional[int] = None, acquire_timeout: float = 30):
+        self._connect = connect
+        self.max_size = max(max_size, pool_size)
+        self.query_timeout = query_timeout
+        self.acquire_timeout = acquire_timeout
+        self._idle: "queue.Queue[Any]" = queue.Queue(maxsize=pool_size)
+        self._slots = threading.BoundedSemaphore(self.max_size)
+
+    @contextmanager
+    def acquire(self) -> Iterator[Any]:
+        """Check a connection out of the pool and return it when done."""
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError("No available connections in the pool")
+        conn = None
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+                if self.query_timeout:
+                    conn.timeout = self.query_timeout
+            yield conn
+        except _DB_ERRORS as e:
+            # Don't hand a lost connection to the next caller; after a
+            # statement error the connection is still usable
+            if conn is not None and _is_disconnected(e):
+                self._discard(conn)
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                self.release(conn)
+            self._slots.release()
+
+    def release(self, conn) -> None:
+        """Reset a connection's session state and put it back in the pool."""
+        try:
+            conn.set_attr(_SQL_COPT_SS_RESET_CONNECTION, _SQL_RESET_CONNECTION_YES)
+        except (AttributeError, *_DB_ERRORS) as e:
+            # Older pyodbc or a driver without the attribute; callers clean
+            # up their own session state
+            logger.debug("Connection reset not supported: %s", e)
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            self._discard(conn)
+
+    def _discard(self, conn) -> None:
+        """Close a connection that is leaving the pool."""
+        try:
+            conn.close()
+        except _DB_ERRORS as e:
+            logger.warning("Error closing connection: %s", e)
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+        logger.info("Blocking connection pool closed")
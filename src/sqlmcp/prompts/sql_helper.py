@@ -6,18 +6,8 @@ from mcp.server.fastmcp.prompts import base
 
 from DB_USER.server import server  # Import server to use decorators
 
-@server.prompt()
-def analyze_query(query: str) -> str:
-    """
-    Create a prompt for analyzing a SQL query.
-    
-    Args:
-        query: SQL query to analyze
-    
-    Returns:
-        A prompt asking to analyze the query
-    """
-    return f"""Please analyze this SQL query:
+# Prompt templates are built once; only the arguments are filled in per call
+_ANALYZE_TPL = """Please analyze this SQL query:
 
 ```sql
 {query}
@@ -30,6 +20,36 @@ Provide the following details:
 4. Suggestions for improvements
 """
 
+_SUGGEST_INDEX_TPL = """Based on the following information:
+
+Table: {table_name}
+Common query pattern: {query_pattern}
+
+Please suggest an appropriate index design that would improve performance.
+Explain why this index would be beneficial and any trade-offs to consider.
+Include a sample SQL statement to create the index.
+"""
+
+_GENERATE_SYSTEM_MSG = base.SystemMessage(
+    "You are a SQL expert helping to write optimized SQL Server queries."
+)
+_GENERATE_ASSISTANT_MSG = base.AssistantMessage(
+    "I'll help you create an efficient SQL query for this need. Let me clarify a few details first:"
+)
+
+@server.prompt()
+def analyze_query(query: str) -> str:
+    """
+    Create a prompt for analyzing a SQL query.
+    
+    Args:
+        query: SQL query to analyze
+    
+    Returns:
+        A prompt asking to analyze the query
+    """
+    return _ANALYZE_TPL.format(query=query)
+
 @server.prompt()
 def suggest_index(table_name: str, query_pattern: str) -> str:
     """
@@ -42,15 +62,7 @@ def suggest_index(table_name: str, query_pattern: str) -> str:
     Returns:
         A prompt asking to suggest an appropriate index
     """
-    return f"""Based on the following information:
-
-Table: {table_name}
-Common query pattern: {query_pattern}
-
-Please suggest an appropriate index design that would improve performance.
-Explain why this index would be beneficial and any trade-offs to consider.
-Include a sample SQL statement to create the index.
-"""
+    return _SUGGEST_INDEX_TPL.format(table_name=table_name, query_pattern=query_pattern)
 
 @server.prompt()
 def generate_query(description: str, table_info: str = None) -> list[base.Message]:
@@ -65,9 +77,7 @@ def generate_query(description: str, table_info: str = None) -> list[base.Messag
         A multi-message prompt for generating a query
     """
     messages = [
-        base.SystemMessage(
-            "You are a SQL expert helping to write optimized SQL Server queries."
-        ),
+        _GENERATE_SYSTEM_MSG,
         base.UserMessage(f"I need to write a SQL query that {description}")
     ]
     
@@ -76,10 +86,6 @@ def generate_query(description: str, table_info: str = None) -> list[base.Messag
             base.UserMessage(f"Here is information about the tables involved:\n\n{table_info}")
         )
     
-    messages.append(
-        base.AssistantMessage(
-            "I'll help you create an efficient SQL query for this need. Let me clarify a few details first:"
-        )
-    )
+    messages.append(_GENERATE_ASSISTANT_MSG)
     
     return messages
@@ -4,12 +4,15 @@ Main MCP server implementation for SQL Server exploration.
 from mcp.server.fastmcp import FastMCP, Context
 from contextlib import asynccontextmanager
 from collections.abc import AsyncIterator
+from contextvars import ContextVar
 from dataclasses import dataclass
 import logging
 import sys
+import asyncio
 
 from DB_USER.config import Settings, load_settings, DEFAULT_SQL_SERVER, DEFAULT_SQL_DATABASE
 from DB_USER.db.connection import DBConnectionPool
+from DB_USER.db.pool import BlockingConnectionPool, build_connection_string
 from DB_USER.utils.logging import setup_logging
 
 # Setup logging
@@ -30,8 +33,18 @@ settings = load_settings()
 @dataclass
 class AppContext:
     """Application context with database connection pool."""
+    __slots__ = ("db_pool",)
     db_pool: DBConnectionPool
 
+def _log_warmup_result(task: asyncio.Task) -> None:
+    """Report a failed background pool warmup."""
+    if not task.cancelled() and task.exception():
+        logger.warning(f"Connection pool warmup incomplete: {task.exception()}")
+
+# Pool for the running server, set by app_lifespan. Request handlers run
+# in tasks started inside the lifespan, so they inherit it.
+_DB_POOL: ContextVar[DBConnectionPool] = ContextVar("db_pool")
+
 @asynccontextmanager
 async def app_lifespan(server: FastMCP) -> AsyncIterator[AppContext]:
     """Initialize and manage application lifecycle."""
@@ -53,13 +66,19 @@ async def app_lifespan(server: FastMCP) -> AsyncIterator[AppContext]:
         username=settings.db_username,
         password=settings.db_password,
         pool_size=settings.connection_pool_size,
-        timeout=settings.connection_timeout
+        timeout=settings.connection_timeout,
+        mock_mode=settings.mock_mode
     )
     
+    warmup_task = None
+    pool_token = _DB_POOL.set(db_pool)
     try:
-        # Connect to database
+        # Connections are opened on first use; warm the pool up in the
+        # background so startup doesn't wait for pool_size connects
         await db_pool.initialize()
-        logger.info(f"Connected to database {settings.db_name} on {settings.db_server}")
+        warmup_task = asyncio.create_task(db_pool.warmup())
+        warmup_task.add_done_callback(_log_warmup_result)
+        logger.info(f"Connection pool ready for {settings.db_name} on {settings.db_server}")
         
         # Yield context to server
         yield AppContext(db_pool=db_pool)
@@ -71,9 +90,14 @@ async def app_lifespan(server: FastMCP) -> AsyncIterator[AppContext]:
         yield AppContext(db_pool=None)
     finally:
         # Cleanup on shutdown
+        if warmup_task and not warmup_task.done():
+            warmup_task.cancel()
         if db_pool:
             logger.info("Shutting down SQL Explorer MCP Server")
             await db_pool.close()
+        if _blocking_pool:
+            _blocking_pool.close()
+        _DB_POOL.reset(pool_token)
 
 # Create MCP server with context - using standard MCP approach
 server = FastMCP(
@@ -83,6 +107,104 @@ server = FastMCP(
     dependencies=["pyodbc", "pandas"]
 )
 
+# Helper functions for tools to use
+def get_db_pool() -> DBConnectionPool:
+    """Get the running server's connection pool."""
+    return _DB_POOL.get()
+
+async def get_db_connection(ctx: Context):
+    """Get database connection from context."""
+    pool = _DB_POOL.get(None)
+    return pool if pool is not None else ctx.lifespan_context.db_pool
+
+def _get_db_connection_blocking():
+    """Open a new database connection (blocking version); the caller closes it."""
+    import pyodbc
+    conn_str = build_connection_string(
+        server=settings.db_server,
+        database=settings.db_name,
+        authentication=settings.auth_method,
+        username=settings.db_username,
+        password=settings.db_password
+    )
+    return pyodbc.connect(conn_str, autocommit=True, timeout=settings.connection_timeout)
+
+# Connections for the blocking helpers, reused across queries instead of
+# opening (and authenticating) one per query
+_blocking_pool = BlockingConnectionPool(
+    _get_db_connection_blocking,
+    pool_size=settings.connection_pool_size,
+    max_size=settings.connection_pool_max,
+    query_timeout=settings.query_timeout
+) if settings else None
+
+# Rows pulled from the driver per round trip in _execute_query_blocking
+_FETCH_BATCH_SIZE = 1000
+
+def _execute_query_blocking(query, params=None):
+    """Execute query (blocking version)."""
+    if not _blocking_pool:
+        return []
+    
+    try:
+        with _blocking_pool.acquire() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, params or [])
+                if not cursor.description:
+                    return []
+                
+                # Convert to list of dictionaries, sharing one interned key per column
+                columns = tuple(sys.intern(column[0]) for column in cursor.description)
+                results = []
+                while True:
+                    rows = cursor.fetchmany(_FETCH_BATCH_SIZE)
+                    if not rows:
+                        break
+                    results.extend(dict(zip(columns, row)) for row in rows)
+                
+                return results
+            finally:
+                cursor.close()
+    except Exception as e:
+        logger.error(f"Error executing query: {e}")
+        return []
+
+# Import and register all tools
+def register_all_tools():
+    """Register all tools with the MCP server."""
+    # Import tool modules; schema registers its tools through the
+    # @server.tool() decorators when it is imported
+    from DB_USER.tools import schema, query, analyze, metadata, schema_extended
+    from DB_USER.utils.security import is_safe_query
+    from DB_USER.tools import schema_extended_adapter
+    
+    # Define allowed schemas
+    ALLOWED_SCHEMAS = ["dbo"]
+    
+    # Register query tools
+    query.register_tools(server, get_db_connection)
+    
+    # Register analyze tools
+    analyze.register_tools(server, get_db_connection, _get_db_connection_blocking, _execute_query_blocking)
+    
+    # Register metadata tools
+    metadata.register_tools(server, get_db_connection, _get_db_connection_blocking, _execute_query_blocking)
+    
+    # Register schema_extended tools
+    schema_extended.register_tools(server, _get_db_connection_blocking, _execute_query_blocking)
+    
+    # Register schema_extended_adapter tools
+    schema_extended_adapter.register_tools(
+        server, 
+        _get_db_connection_blocking, 
+        _execute_query_blocking,
+        ALLOWED_SCHEMAS,
+        is_safe_query
+    )
+    
+    logger.info("All tools registered successfully")
+
 def start_server():
     """Start the MCP server."""
     import uvicorn
@@ -90,6 +212,9 @@ def start_server():
     if not settings:
         logger.error("Cannot start server: Missing configuration")
         return
+    
+    # Register all tools before starting server
+    register_all_tools()
         
     logger.info(f"Starting server on {settings.host}:{settings.port}")
     try:
@@ -3,6 +3,7 @@ Tools module initialization.
 """
 import logging
 import importlib
+import os
 import sys
 from typing import Dict, List, Any, Optional, Callable
 
@@ -45,6 +46,49 @@ __all__ = [
     'schema_adapter'
 ]
 
+# Module defining each exported tool. Tool modules are only imported when
+# one of their names is first accessed (PEP 562), not when this package is.
+_LAZY = {
+    'get_table_schema': '.schema_fixed',
+    'list_tables': '.schema_fixed',
+    'find_foreign_keys': '.schema_fixed',
+    'execute_select': '.query_fixed',
+    'get_sample_data': '.query_fixed',
+    'explain_query': '.query_fixed',
+    'analyze_table_data': '.analyze_fixed',
+    'find_duplicate_records': '.analyze_fixed',
+    'get_database_info': '.metadata_fixed',
+    'list_stored_procedures': '.metadata_fixed',
+    'get_procedure_definition': '.metadata_fixed',
+    'list_schemas': '.schema_extended',
+    'search_schema_objects': '.schema_extended',
+    'find_related_tables': '.schema_extended',
+    'get_query_examples': '.schema_extended',
+    'enhanced_list_schemas': '.schema_extended_adapter_fixed',
+    'enhanced_get_sample_data': '.schema_extended_adapter_fixed',
+    'enhanced_search_schema_objects': '.schema_extended_adapter_fixed',
+    'enhanced_find_related_tables': '.schema_extended_adapter_fixed',
+    'enhanced_get_query_examples': '.schema_extended_adapter_fixed',
+    'schema_adapter': '.schema_extended_adapter_fixed',
+}
+
+def __getattr__(name: str) -> Any:
+    """Import the tool module defining name on first access and cache the result."""
+    module_path = _LAZY.get(name)
+    if module_path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_path, __package__), name)
+    globals()[name] = value
+    return value
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY))
+
+# Resolve everything up front (e.g. in CI) to surface import errors early
+if os.environ.get("SQLMCP_EAGER_IMPORT") == "1":
+    for _name in _LAZY:
+        __getattr__(_name)
+
 # Import helper
 def import_module_safe(module_name: str) -> Optional[Any]:
     """Safely import a module."""
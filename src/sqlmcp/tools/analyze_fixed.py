@@ -6,9 +6,13 @@ and identifying potential data issues.
 """
 import logging
 import asyncio
-from typing import Dict, List, Any, Optional
+import os
+import threading
+from typing import Dict, List, Any, Optional, Tuple
 import time
 import math
+from itertools import groupby
+from operator import itemgetter
 
 # Configure logging
 logger = logging.getLogger("DB_USER_Analyze")
@@ -18,6 +22,9 @@ mcp = None
 get_db_connection = None
 _get_db_connection_blocking = None
 _execute_query_blocking = None
+# Optional context manager checking out a pooled connection; without it the
+# sample queries share the single blocking connection
+_acquire_connection_blocking = None
 
 def register_tools(mcp_instance, db_connection_function, db_connection_blocking, execute_query_blocking):
     """Register this module's functions with the MCP instance."""
@@ -33,10 +40,279 @@ def register_tools(mcp_instance, db_connection_function, db_connection_blocking,
     
     logger.info("Registered analyze tools with MCP instance")
 
+# Table metadata cache. One question usually leads to several tool calls on
+# the same table, so each (schema, table) lookup is kept for DB_META_TTL
+# seconds (0 disables caching). invalidate_table_meta drops entries after DDL.
+_TABLE_META_TTL = int(os.environ.get("DB_META_TTL", "300"))
+_TABLE_META_MAX_ENTRIES = 1024
+_TABLE_META_CACHE: Dict[Tuple[str, str], tuple] = {}
+_TABLE_META_LOCK = threading.Lock()
+
+# Table type, columns and primary key membership in one round trip; no rows
+# means the table does not exist
+_TABLE_META_QUERY = """
+SELECT t.TABLE_TYPE, c.COLUMN_NAME, c.DATA_TYPE,
+    CASE WHEN pk.COLUMN_NAME IS NULL THEN 0 ELSE 1 END AS IS_PRIMARY_KEY
+FROM INFORMATION_SCHEMA.TABLES t
+JOIN INFORMATION_SCHEMA.COLUMNS c
+    ON c.TABLE_SCHEMA = t.TABLE_SCHEMA AND c.TABLE_NAME = t.TABLE_NAME
+LEFT JOIN (
+    SELECT ku.TABLE_SCHEMA, ku.TABLE_NAME, ku.COLUMN_NAME
+    FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc
+    JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE ku
+        ON tc.CONSTRAINT_NAME = ku.CONSTRAINT_NAME
+        AND tc.TABLE_SCHEMA = ku.TABLE_SCHEMA
+        AND tc.TABLE_NAME = ku.TABLE_NAME
+    WHERE tc.CONSTRAINT_TYPE = 'PRIMARY KEY'
+) pk
+    ON pk.TABLE_SCHEMA = c.TABLE_SCHEMA
+    AND pk.TABLE_NAME = c.TABLE_NAME
+    AND pk.COLUMN_NAME = c.COLUMN_NAME
+WHERE t.TABLE_SCHEMA = ? AND t.TABLE_NAME = ?
+ORDER BY c.ORDINAL_POSITION
+"""
+
+async def _get_table_meta(schema: str, table: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Get a table's column rows and primary key columns, cached per table.
+    
+    Returns:
+        (columns_info, pk_columns); columns_info is empty if the table does
+        not exist. Callers must not modify the returned lists.
+    """
+    key = (schema, table)
+    if _TABLE_META_TTL > 0:
+        with _TABLE_META_LOCK:
+            entry = _TABLE_META_CACHE.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+    
+    columns_info = await asyncio.to_thread(_execute_query_blocking, _TABLE_META_QUERY, key)
+    pk_columns = [col['COLUMN_NAME'] for col in columns_info if col['IS_PRIMARY_KEY']]
+    meta = (columns_info, pk_columns)
+    
+    # Missing tables aren't cached so they are found as soon as they're created
+    if _TABLE_META_TTL > 0 and columns_info:
+        with _TABLE_META_LOCK:
+            _TABLE_META_CACHE.pop(key, None)
+            if len(_TABLE_META_CACHE) >= _TABLE_META_MAX_ENTRIES:
+                # Entries are kept in insertion order; evict the oldest
+                del _TABLE_META_CACHE[next(iter(_TABLE_META_CACHE))]
+            _TABLE_META_CACHE[key] = (time.monotonic() + _TABLE_META_TTL, meta)
+    return meta
+
+def invalidate_table_meta(schema: Optional[str] = None, table: Optional[str] = None) -> int:
+    """
+    Drop cached table metadata, e.g. after DDL on the table.
+    
+    Args:
+        schema: Schema name; with table, drops only that table's entry
+        table: Table name
+        
+    Returns:
+        Number of entries removed; with no arguments the whole cache is cleared
+    """
+    with _TABLE_META_LOCK:
+        if schema is None or table is None:
+            cleared = len(_TABLE_META_CACHE)
+            _TABLE_META_CACHE.clear()
+            return cleared
+        return 1 if _TABLE_META_CACHE.pop((schema, table), None) is not None else 0
+
+# The shared blocking connection must not run statements from two threads
+# at once; pooled connections need no lock
+_SAMPLE_LOCK = threading.Lock()
+
+# SQLSTATEs meaning the connection itself is gone rather than the statement
+# having failed
+_DISCONNECT_SQLSTATES = frozenset({"08S01", "08003"})
+
+def _query_sample_blocking(sample_query: Optional[str], queries: List[str]) -> List[List[Dict[str, Any]]]:
+    """
+    Materialize a sample into #sample, run queries against it, then drop it.
+    
+    A temp table is only visible to the connection that created it, so all
+    statements run on one connection rather than through _execute_query_blocking.
+    Without a sample_query the queries read the base table and no #sample
+    is created.
+    
+    Returns:
+        One list of row dictionaries per query
+    """
+    if _acquire_connection_blocking is not None:
+        with _acquire_connection_blocking() as conn:
+            return _run_on_sample(conn, sample_query, queries)
+    with _SAMPLE_LOCK:
+        conn = _get_db_connection_blocking()
+        try:
+            return _run_on_sample(conn, sample_query, queries)
+        except Exception as e:
+            if not (e.args and e.args[0] in _DISCONNECT_SQLSTATES):
+                raise
+            # The server dropped the shared connection without it being
+            # marked closed; close it so the next call opens a new one
+            logger.warning(f"Database connection lost ({e.args[0]}), retrying on a new connection")
+            try:
+                conn.close()
+            except Exception:
+                pass
+        return _run_on_sample(_get_db_connection_blocking(), sample_query, queries)
+
+def _run_on_sample(conn, sample_query: Optional[str], queries: List[str]) -> List[List[Dict[str, Any]]]:
+    """Run the sample statement and queries on one connection, always dropping #sample."""
+    cursor = conn.cursor()
+    try:
+        if sample_query is not None:
+            cursor.execute(sample_query)
+        results = []
+        for query in queries:
+            cursor.execute(query)
+            columns = [column[0] for column in cursor.description]
+            results.append([dict(zip(columns, row)) for row in cursor.fetchall()])
+        return results
+    finally:
+        if sample_query is not None:
+            try:
+                cursor.execute("IF OBJECT_ID('tempdb..#sample') IS NOT NULL DROP TABLE #sample")
+            except Exception as e:
+                logger.warning(f"Error dropping #sample: {e}")
+        cursor.close()
+
+def _qi(name: str) -> str:
+    """Quote a SQL Server identifier, escaping any closing brackets in it."""
+    return '[' + name.replace(']', ']]') + ']'
+
+# Row count from partition metadata: instant, but can lag in-flight changes
+_ROW_COUNT_QUERY = """
+SELECT SUM(p.row_count) AS row_count
+FROM sys.dm_db_partition_stats p
+JOIN sys.objects o ON o.object_id = p.object_id
+JOIN sys.schemas s ON s.schema_id = o.schema_id
+WHERE p.index_id IN (0, 1) AND s.name = ? AND o.name = ?
+"""
+
+async def _count_rows(schema: str, table: str, is_table: bool, exact_count: bool) -> int:
+    """
+    Get a table's row count, from partition stats unless exact_count is set.
+    
+    Views have no partition stats and are always counted with COUNT(*), as
+    are tables whose stats can't be read (e.g. without VIEW DATABASE STATE).
+    """
+    if is_table and not exact_count:
+        try:
+            result = await asyncio.to_thread(_execute_query_blocking, _ROW_COUNT_QUERY, (schema, table))
+            if result and result[0]['row_count'] is not None:
+                return int(result[0]['row_count'])
+        except ValueError as e:
+            logger.warning(f"Falling back to COUNT(*) for {schema}.{table}: {e}")
+    
+    count_query = f"SELECT COUNT(*) AS row_count FROM {_qi(schema)}.{_qi(table)}"
+    count_result = await asyncio.to_thread(_execute_query_blocking, count_query)
+    return count_result[0]['row_count'] if count_result else 0
+
+def _sample_clauses(sample_size: int, total_rows: int, is_table: bool) -> Tuple[str, str, str]:
+    """
+    TOP, TABLESAMPLE and ORDER BY clauses that draw about sample_size random rows.
+    
+    ORDER BY NEWID() alone scans and sorts the whole table. For samples well
+    below the table size, TABLESAMPLE first reads a matching share of pages
+    (with 20% headroom, since page sampling is approximate) and only those
+    rows are shuffled. Views cannot be page-sampled.
+    
+    total_rows may be an estimate, so TOP is kept even when the sample
+    should cover the whole table.
+    """
+    if sample_size <= 0:
+        return "", "", ""
+    if sample_size >= total_rows:
+        # The sample is the whole table; no need to shuffle
+        return f"TOP {sample_size}", "", ""
+    if not is_table or sample_size > total_rows * 0.5:
+        return f"TOP {sample_size}", "", "ORDER BY NEWID()"
+    percent = max(1, min(100, math.ceil(sample_size * 100.0 / total_rows * 1.2)))
+    return f"TOP {sample_size}", f"TABLESAMPLE ({percent} PERCENT)", "ORDER BY NEWID()"
+
+# Data type groups that get type-specific statistics
+_TEXT_TYPES = frozenset(('char', 'varchar', 'nchar', 'nvarchar', 'text', 'ntext'))
+_NUMERIC_TYPES = frozenset(('tinyint', 'smallint', 'int', 'bigint', 'decimal', 'numeric',
+                            'float', 'real', 'money', 'smallmoney'))
+_DATE_TYPES = frozenset(('date', 'datetime', 'datetime2', 'smalldatetime', 'datetimeoffset'))
+# Types SQL Server cannot compare, so COUNT(DISTINCT ...) is not possible
+_UNCOMPARABLE_TYPES = frozenset(('xml', 'image', 'geography', 'geometry'))
+
+def _column_stat_exprs(i: int, column: str, data_type: str) -> List[str]:
+    """Aggregate expressions for one column, aliased c{i}_<stat>."""
+    exprs = [f"SUM(CASE WHEN {column} IS NULL THEN 1 ELSE 0 END) AS c{i}_nulls"]
+    if data_type in ('text', 'ntext'):
+        # Legacy LOB types only support comparisons and LEN once cast
+        column = f"CAST({column} AS NVARCHAR(MAX))"
+    if data_type not in _UNCOMPARABLE_TYPES:
+        exprs.append(f"COUNT(DISTINCT {column}) AS c{i}_distinct")
+    
+    if data_type in _TEXT_TYPES:
+        exprs += [
+            f"MIN(LEN({column})) AS c{i}_min_len",
+            f"MAX(LEN({column})) AS c{i}_max_len",
+            f"AVG(CAST(LEN({column}) AS FLOAT)) AS c{i}_avg_len",
+        ]
+    elif data_type in _NUMERIC_TYPES:
+        # FLOAT keeps SUM/AVG of large values from overflowing
+        exprs += [
+            f"MIN(CAST({column} AS FLOAT)) AS c{i}_min",
+            f"MAX(CAST({column} AS FLOAT)) AS c{i}_max",
+            f"AVG(CAST({column} AS FLOAT)) AS c{i}_avg",
+            f"SUM(CAST({column} AS FLOAT)) AS c{i}_sum",
+        ]
+    elif data_type in _DATE_TYPES:
+        exprs += [
+            f"MIN({column}) AS c{i}_min_date",
+            f"MAX({column}) AS c{i}_max_date",
+            f"DATEDIFF(day, MIN({column}), MAX({column})) AS c{i}_range_days",
+        ]
+    return exprs
+
+def _parse_column_stats(i: int, data_type: str, stats: Dict[str, Any], analyzed_rows: int) -> Dict[str, Any]:
+    """Build one column's analysis from the c{i}_* values of the statistics row."""
+    column_type = data_type.lower()
+    null_count = stats[f"c{i}_nulls"] or 0
+    column_analysis = {
+        "data_type": data_type,
+        "null_count": null_count,
+        "null_percentage": round((null_count / analyzed_rows * 100), 2) if analyzed_rows > 0 else 0,
+        "distinct_values": stats.get(f"c{i}_distinct")
+    }
+    
+    if column_type in _TEXT_TYPES:
+        if stats[f"c{i}_min_len"] is not None:
+            column_analysis["length_stats"] = {
+                "min": stats[f"c{i}_min_len"],
+                "max": stats[f"c{i}_max_len"],
+                "avg": round(stats[f"c{i}_avg_len"], 2)
+            }
+    elif column_type in _NUMERIC_TYPES:
+        if stats[f"c{i}_min"] is not None:
+            column_analysis["numeric_stats"] = {
+                "min": stats[f"c{i}_min"],
+                "max": stats[f"c{i}_max"],
+                "avg": round(stats[f"c{i}_avg"], 2),
+                "sum": round(stats[f"c{i}_sum"], 2)
+            }
+    elif column_type in _DATE_TYPES:
+        min_date = stats[f"c{i}_min_date"]
+        max_date = stats[f"c{i}_max_date"]
+        if min_date is not None:
+            column_analysis["date_stats"] = {
+                "min_date": min_date.isoformat() if hasattr(min_date, 'isoformat') else str(min_date),
+                "max_date": max_date.isoformat() if hasattr(max_date, 'isoformat') else str(max_date),
+                "date_range_days": stats[f"c{i}_range_days"]
+            }
+    return column_analysis
+
 async def analyze_table_data(
     table_name: str,
     column_names: Optional[List[str]] = None,
-    sample_size: int = 1000
+    sample_size: int = 1000,
+    exact_count: bool = False
 ) -> Dict[str, Any]:
     """
     Analyze table data to provide insights on column distributions and statistics.
@@ -45,6 +321,7 @@ async def analyze_table_data(
         table_name: Table name (format: 'schema.table' or just 'table' for default 'dbo' schema)
         column_names: Optional list of specific columns to analyze. If not provided, analyzes all columns.
         sample_size: Number of rows to sample for analysis (default: 1000, 0 for all rows)
+        exact_count: Count rows with COUNT(*) instead of reading partition stats (default: False)
         
     Returns:
         Dictionary containing analysis results for each analyzed column
@@ -59,36 +336,15 @@ async def analyze_table_data(
         schema_name = 'dbo'  # Default schema
         table_name_only = parts[0]
     
-    # Verify table exists
-    validate_query = "SELECT COUNT(*) AS count FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ?"
-    
     try:
-        # Validate table exists using the existing blocking function wrapped in asyncio.to_thread
-        validation_result = await asyncio.to_thread(
-            _execute_query_blocking,
-            validate_query,
-            (schema_name, table_name_only)
-        )
+        columns_info, _ = await _get_table_meta(schema_name, table_name_only)
         
-        if not validation_result or validation_result[0].get('count', 0) == 0:
+        if not columns_info:
             return {
                 "error": f"Table '{schema_name}.{table_name_only}' not found",
                 "details": "The specified table does not exist or is not accessible"
             }
-        
-        # Get column information
-        columns_query = """
-        SELECT COLUMN_NAME, DATA_TYPE
-        FROM INFORMATION_SCHEMA.COLUMNS
-        WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ?
-        ORDER BY ORDINAL_POSITION
-        """
-        
-        columns_info = await asyncio.to_thread(
-            _execute_query_blocking,
-            columns_query,
-            (schema_name, table_name_only)
-        )
+        is_table = columns_info[0]['TABLE_TYPE'] == 'BASE TABLE'
         
         # Filter columns if specific ones requested
         if column_names:
@@ -105,9 +361,7 @@ async def analyze_table_data(
                 }
         
         # Get total row count
-        count_query = f"SELECT COUNT(*) AS row_count FROM [{schema_name}].[{table_name_only}]"
-        count_result = await asyncio.to_thread(_execute_query_blocking, count_query)
-        total_rows = count_result[0]['row_count'] if count_result else 0
+        total_rows = await _count_rows(schema_name, table_name_only, is_table, exact_count)
         
         # Prepare analysis results
         analysis_results = {
@@ -117,205 +371,82 @@ async def analyze_table_data(
             "column_analysis": {}
         }
         
-        # Analyze each column
-        for column in columns_info:
-            column_name = column['COLUMN_NAME']
-            data_type = column['DATA_TYPE']
-            
-            # Get sample limit clause
-            sample_clause = f"TOP {sample_size}" if sample_size > 0 else ""
-            
-            # Use a more robust approach for getting sample data
+        if not columns_info:
+            logger.info(f"Completed data analysis for {schema_name}.{table_name_only}")
+            return analysis_results
+        
+        # The sample is drawn once into #sample; one aggregate query then
+        # computes every column's statistics over it, and one UNION ALL
+        # query returns the top values of all text columns. When every row
+        # is analyzed, those queries read the table directly instead of
+        # copying it into tempdb first.
+        quoted_cols = [_qi(col['COLUMN_NAME']) for col in columns_info]
+        if sample_size > 0:
+            top_clause, tablesample_clause, order_clause = _sample_clauses(sample_size, total_rows, is_table)
             sample_query = f"""
-            SELECT {sample_clause} [{column_name}]
-            FROM [{schema_name}].[{table_name_only}]
-            {f"ORDER BY NEWID()" if sample_size > 0 else ""}
+            SELECT {top_clause} {", ".join(quoted_cols)}
+            INTO #sample
+            FROM {_qi(schema_name)}.{_qi(table_name_only)} {tablesample_clause}
+            {order_clause}
             """
-            
-            try:
-                sample_data = await asyncio.to_thread(_execute_query_blocking, sample_query)
-                
-                # Count null values
-                null_count = sum(1 for row in sample_data if row[column_name] is None)
-                
-                # Initialize column analysis
-                column_analysis = {
-                    "data_type": data_type,
-                    "null_count": null_count
-                }
-                
-                # Calculate null percentage safely
-                analyzed_rows = len(sample_data)
-                if analyzed_rows > 0:
-                    column_analysis["null_percentage"] = round((null_count / analyzed_rows * 100), 2)
-                else:
-                    column_analysis["null_percentage"] = 0
-                
-                # Count distinct values (without using SQL which might overflow)
-                non_null_values = [row[column_name] for row in sample_data if row[column_name] is not None]
-                distinct_values = set()
-                for val in non_null_values:
-                    # Convert to string to handle any type
-                    if val is not None:
-                        try:
-                            distinct_values.add(str(val AS FLOAT))
-                        except:
-                            # Skip values that can't be converted to string
-                            pass
-                
-                column_analysis["distinct_values"] = len(distinct_values)
-                
-                # Analyze based on data type
-                if data_type.lower() in ('char', 'varchar', 'nchar', 'nvarchar', 'text', 'ntext'):
-                    # Text analysis
-                    try:
-                        # Frequency distribution for string values
-                        value_counts = {}
-                        for val in non_null_values:
-                            str_val = str(val)
-                            if str_val in value_counts:
-                                value_counts[str_val] += 1
-                            else:
-                                value_counts[str_val] = 1
-                        
-                        # Sort by frequency and get top 10
-                        top_values = sorted(value_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-                        
-                        column_analysis["top_values"] = [{
-                            "value": value,
-                            "frequency": count,
-                            "percentage": round((count / len(non_null_values) * 100), 2) if non_null_values else 0
-                        } for value, count in top_values]
-                        
-                        # Length statistics
-                        if non_null_values:
-                            lengths = [len(str(val AS FLOAT)) for val in non_null_values if val is not None]
-                            if lengths:
-                                column_analysis["length_stats"] = {
-                                    "min": min(lengths),
-                                    "max": max(lengths),
-                                    "avg": round(sum(lengths) / len(lengths), 2)
-                                }
-                    except Exception as e:
-                        logger.warning(f"Error analyzing text column {column_name}: {e}")
-                
-                elif data_type.lower() in ('tinyint', 'smallint', 'int', 'bigint', 'decimal', 'numeric', 'float', 'real', 'money', 'smallmoney'):
-                    # Numeric analysis
-                    try:
-                        # Convert to float for calculations to avoid overflow
-                        numeric_values = []
-                        for val in non_null_values:
-                            try:
-                                numeric_values.append(float(val AS FLOAT))
-                            except (ValueError, TypeError):
-                                # Skip values that can't be converted to float
-                                pass
-                        
-                        if numeric_values:
-                            column_analysis["numeric_stats"] = {
-                                "min": min(numeric_values),
-                                "max": max(numeric_values),
-                                "avg": round(sum(numeric_values) / len(numeric_values), 2),
-                                # Use safe sum calculation
-                                "sum": round(sum(numeric_values), 2)
-                            }
-                    except Exception as e:
-                        logger.warning(f"Error analyzing numeric column {column_name}: {e}")
-                        # Provide a fallback using SQL but with DECIMAL casting to avoid overflow
-                        try:
-                            safe_stats_query = f"""
-                            SELECT 
-                                MIN(CAST([{column_name}] AS DECIMAL(38,4 AS FLOAT))) AS min_value,
-                                MAX(CAST([{column_name}] AS DECIMAL(38,4 AS FLOAT))) AS max_value,
-                                AVG(CAST(CAST(CAST(CAST([{column_name}] AS DECIMAL(38,4 AS FLOAT))) AS avg_value
-                            FROM (
-                                SELECT {sample_clause} *
-                                FROM [{schema_name}].[{table_name_only}]
-                                {f"ORDER BY NEWID()" if sample_size > 0 else ""}
-                            ) AS sample_data
-                            WHERE [{column_name}] IS NOT NULL
-                            """
-                            
-                            safe_stats_result = await asyncio.to_thread(_execute_query_blocking, safe_stats_query)
-                            
-                            if safe_stats_result:
-                                column_analysis["numeric_stats"] = {
-                                    "min": safe_stats_result[0]['min_value'],
-                                    "max": safe_stats_result[0]['max_value'],
-                                    "avg": round(safe_stats_result[0]['avg_value'], 2) if safe_stats_result[0]['avg_value'] is not None else None,
-                                    # Sum not included due to potential overflow
-                                }
-                        except Exception as e2:
-                            logger.error(f"Error in fallback numeric analysis for {column_name}: {e2}")
-                            column_analysis["numeric_stats"] = {
-                                "error": "Could not calculate numeric statistics due to potential overflow or data type issues"
-                            }
-                
-                elif data_type.lower() in ('date', 'datetime', 'datetime2', 'smalldatetime', 'datetimeoffset'):
-                    # Date analysis
-                    try:
-                        if non_null_values:
-                            # Since we already have the data, we don't need to query again
-                            date_objects = []
-                            for val in non_null_values:
-                                if hasattr(val, 'isoformat'):  # Check if it's a date object
-                                    date_objects.append(val)
-                            
-                            if date_objects:
-                                min_date = min(date_objects)
-                                max_date = max(date_objects)
-                                # Calculate date range in days safely
-                                try:
-                                    if hasattr(max_date, 'toordinal') and hasattr(min_date, 'toordinal'):
-                                        date_range_days = max_date.toordinal() - min_date.toordinal()
-                                    else:
-                                        # Fallback using total_seconds for datetime objects
-                                        date_range_days = (max_date - min_date).total_seconds() / (24*60*60)
-                                except Exception:
-                                    date_range_days = None
-                                
-                                column_analysis["date_stats"] = {
-                                    "min_date": min_date.isoformat() if hasattr(min_date, 'isoformat') else str(min_date),
-                                    "max_date": max_date.isoformat() if hasattr(max_date, 'isoformat') else str(max_date),
-                                    "date_range_days": date_range_days
-                                }
-                    except Exception as e:
-                        logger.warning(f"Error analyzing date column {column_name}: {e}")
-                        # We can try to get date statistics using SQL as fallback
-                        try:
-                            date_stats_query = f"""
-                            SELECT 
-                                MIN([{column_name}]) AS min_date,
-                                MAX([{column_name}]) AS max_date,
-                                DATEDIFF(day, MIN([{column_name}]), MAX([{column_name}] AS FLOAT)) AS date_range_days
-                            FROM (
-                                SELECT {sample_clause} *
-                                FROM [{schema_name}].[{table_name_only}]
-                                {f"ORDER BY NEWID()" if sample_size > 0 else ""}
-                            ) AS sample_data
-                            WHERE [{column_name}] IS NOT NULL
-                            """
-                            
-                            date_stats_result = await asyncio.to_thread(_execute_query_blocking, date_stats_query)
-                            
-                            if date_stats_result:
-                                column_analysis["date_stats"] = {
-                                    "min_date": date_stats_result[0]['min_date'].isoformat() if date_stats_result[0]['min_date'] else None,
-                                    "max_date": date_stats_result[0]['max_date'].isoformat() if date_stats_result[0]['max_date'] else None,
-                                    "date_range_days": date_stats_result[0]['date_range_days']
-                                }
-                        except Exception as e2:
-                            logger.error(f"Error in fallback date analysis for {column_name}: {e2}")
-                
-            except Exception as e:
-                logger.error(f"Error analyzing column {column_name}: {e}")
-                column_analysis = {
-                    "data_type": data_type,
+            source = "#sample"
+        else:
+            sample_query = None
+            source = f"{_qi(schema_name)}.{_qi(table_name_only)}"
+        
+        stat_exprs = ["COUNT_BIG(*) AS analyzed_rows"]
+        top_value_selects = []
+        for i, column in enumerate(columns_info):
+            column_type = column['DATA_TYPE'].lower()
+            stat_exprs.extend(_column_stat_exprs(i, quoted_cols[i], column_type))
+            if column_type in _TEXT_TYPES:
+                value_expr = f"CAST({quoted_cols[i]} AS NVARCHAR(MAX))"
+                top_value_selects.append(f"""
+            SELECT {i} AS column_index, value, frequency FROM (
+                SELECT TOP 10 {value_expr} AS value, COUNT(*) AS frequency
+                FROM {source}
+                WHERE {quoted_cols[i]} IS NOT NULL
+                GROUP BY {value_expr}
+                ORDER BY COUNT(*) DESC
+            ) AS top_{i}""")
+        
+        queries = [f"SELECT {', '.join(stat_exprs)} FROM {source}"]
+        if top_value_selects:
+            queries.append(" UNION ALL".join(top_value_selects))
+        
+        try:
+            results = await asyncio.to_thread(_query_sample_blocking, sample_query, queries)
+            if not results[0]:
+                raise ValueError("Statistics query returned no rows")
+            stats = results[0][0]
+        except Exception as e:
+            logger.error(f"Error analyzing columns of {schema_name}.{table_name_only}: {e}")
+            for column in columns_info:
+                analysis_results["column_analysis"][column['COLUMN_NAME']] = {
+                    "data_type": column['DATA_TYPE'],
                     "error": f"Failed to analyze column: {str(e)}"
                 }
+            return analysis_results
+        
+        top_values: Dict[int, List[Dict[str, Any]]] = {}
+        for row in (results[1] if top_value_selects else []):
+            top_values.setdefault(row['column_index'], []).append(row)
+        
+        # Page sampling is approximate, so report the rows actually analyzed
+        analyzed_rows = stats['analyzed_rows'] or 0
+        analysis_results["analyzed_rows"] = analyzed_rows
+        for i, column in enumerate(columns_info):
+            column_analysis = _parse_column_stats(i, column['DATA_TYPE'], stats, analyzed_rows)
+            if i in top_values:
+                non_null = analyzed_rows - column_analysis["null_count"]
+                column_analysis["top_values"] = [{
+                    "value": row['value'],
+                    "frequency": row['frequency'],
+                    "percentage": round((row['frequency'] / non_null * 100), 2) if non_null else 0
+                } for row in sorted(top_values[i], key=lambda r: r['frequency'], reverse=True)]
             
             # Add column analysis to results
-            analysis_results["column_analysis"][column_name] = column_analysis
+            analysis_results["column_analysis"][column['COLUMN_NAME']] = column_analysis
         
         logger.info(f"Completed data analysis for {schema_name}.{table_name_only}")
         return analysis_results
@@ -331,7 +462,8 @@ async def find_duplicate_records(
     table_name: str,
     column_names: List[str],
     sample_size: int = 1000,
-    min_duplicates: int = 2
+    min_duplicates: int = 2,
+    exact_count: bool = False
 ) -> Dict[str, Any]:
     """
     Find potential duplicate records in a table based on specified columns.
@@ -341,6 +473,7 @@ async def find_duplicate_records(
         column_names: List of column names to check for duplicates
         sample_size: Maximum number of rows to sample (default: 1000, 0 for all rows)
         min_duplicates: Minimum number of duplicates to qualify for reporting (default: 2)
+        exact_count: Count rows with COUNT(*) instead of reading partition stats (default: False)
         
     Returns:
         Dictionary containing duplicate groups found
@@ -362,35 +495,15 @@ async def find_duplicate_records(
         schema_name = 'dbo'  # Default schema
         table_name_only = parts[0]
     
-    # Verify table exists
-    validate_query = "SELECT COUNT(*) AS count FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ?"
-    
     try:
-        # Validate table exists using existing blocking function wrapped in asyncio.to_thread
-        validation_result = await asyncio.to_thread(
-            _execute_query_blocking,
-            validate_query,
-            (schema_name, table_name_only)
-        )
+        columns_info, pk_columns = await _get_table_meta(schema_name, table_name_only)
         
-        if not validation_result or validation_result[0].get('count', 0) == 0:
+        if not columns_info:
             return {
                 "error": f"Table '{schema_name}.{table_name_only}' not found",
                 "details": "The specified table does not exist or is not accessible"
             }
-        
-        # Verify columns exist
-        columns_query = """
-        SELECT COLUMN_NAME
-        FROM INFORMATION_SCHEMA.COLUMNS
-        WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ?
-        """
-        
-        columns_info = await asyncio.to_thread(
-            _execute_query_blocking,
-            columns_query,
-            (schema_name, table_name_only)
-        )
+        is_table = columns_info[0]['TABLE_TYPE'] == 'BASE TABLE'
         
         valid_columns = [col['COLUMN_NAME'] for col in columns_info]
         
@@ -403,61 +516,54 @@ async def find_duplicate_records(
                 "details": f"The following columns do not exist in the table: {', '.join(invalid_columns)}"
             }
         
-        # Format column list for SQL
-        column_list = ", ".join([f"[{col}]" for col in column_names])
-        
-        # Determine if we need a primary key for the results
-        pk_query = """
-        SELECT ku.COLUMN_NAME
-        FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc
-        JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE ku
-            ON tc.CONSTRAINT_NAME = ku.CONSTRAINT_NAME
-            AND tc.TABLE_SCHEMA = ku.TABLE_SCHEMA
-            AND tc.TABLE_NAME = ku.TABLE_NAME
-        WHERE tc.CONSTRAINT_TYPE = 'PRIMARY KEY'
-            AND tc.TABLE_SCHEMA = ?
-            AND tc.TABLE_NAME = ?
-        """
-        
-        pk_result = await asyncio.to_thread(
-            _execute_query_blocking,
-            pk_query,
-            (schema_name, table_name_only)
-        )
-        
-        pk_columns = [row['COLUMN_NAME'] for row in pk_result]
+        # Format column lists for SQL from one pass of quoted identifiers
+        quoted_cols = [_qi(col) for col in column_names]
+        column_list = ", ".join(quoted_cols)
+        group_order = ", ".join([f"s.{col}" for col in quoted_cols])
+        join_cond = " AND ".join([f"s.{col} = d.{col}" for col in quoted_cols])
         
         # Add primary key columns to select clause (if not already included)
-        additional_columns = [col for col in pk_columns if col not in column_names]
-        select_column_list = column_list
+        additional_columns = [_qi(col) for col in pk_columns if col not in column_names]
+        select_column_list = ", ".join(quoted_cols + additional_columns)
         
-        if additional_columns:
-            select_column_list = f"{column_list}, {', '.join([f'[{col}]' for col in additional_columns])}"
+        # Get sample clauses; the row count decides whether page sampling pays off
+        total_rows = await _count_rows(schema_name, table_name_only, is_table, exact_count)
         
-        # Get sample limit clause
-        sample_clause = f"TOP {sample_size}" if sample_size > 0 else ""
+        # Draw the sample once; a CTE referenced twice would be evaluated
+        # twice, giving the GROUP BY and the join-back different samples.
+        # Without sampling both read the table itself.
+        if sample_size > 0:
+            top_clause, tablesample_clause, order_clause = _sample_clauses(sample_size, total_rows, is_table)
+            sample_query = f"""
+            SELECT {top_clause} {select_column_list}
+            INTO #sample
+            FROM {_qi(schema_name)}.{_qi(table_name_only)} {tablesample_clause}
+            {order_clause}
+            """
+            source = "#sample"
+        else:
+            sample_query = None
+            source = f"{_qi(schema_name)}.{_qi(table_name_only)}"
+        result_columns = ", ".join([f"s.{col}" for col in quoted_cols + additional_columns])
         
         # Build the query to find duplicates
         duplicates_query = f"""
-        WITH sample_data AS (
-            SELECT {sample_clause} {select_column_list}
-            FROM [{schema_name}].[{table_name_only}]
-            {f"ORDER BY NEWID()" if sample_size > 0 else ""}
-        ),
-        duplicate_groups AS (
+        WITH duplicate_groups AS (
             SELECT {column_list}, COUNT(*) AS duplicate_count
-            FROM sample_data
+            FROM {source}
             GROUP BY {column_list}
             HAVING COUNT(*) >= {min_duplicates}
         )
-        SELECT s.*
-        FROM sample_data s
-        INNER JOIN duplicate_groups d ON {' AND '.join([f"s.[{col}] = d.[{col}]" for col in column_names])}
-        ORDER BY {column_list}
+        SELECT {result_columns}, DENSE_RANK() OVER (ORDER BY {group_order}) AS __group_id
+        FROM {source} s
+        INNER JOIN duplicate_groups d ON {join_cond}
+        ORDER BY __group_id
         """
         
         # Execute the query
-        duplicates_result = await asyncio.to_thread(_execute_query_blocking, duplicates_query)
+        duplicates_result = (await asyncio.to_thread(
+            _query_sample_blocking, sample_query, [duplicates_query]
+        ))[0]
         
         # If no duplicates found
         if not duplicates_result:
@@ -468,26 +574,17 @@ async def find_duplicate_records(
                 "message": "No duplicate records found based on the specified columns"
             }
         
-        # Process results into groups
-        duplicate_groups = {}
-        
-        for row in duplicates_result:
-            # Create a key for grouping
-            group_key = "_".join([str(row[col]) for col in column_names])
-            
-            # Initialize group if not exists
-            if group_key not in duplicate_groups:
-                duplicate_groups[group_key] = {
-                    "key_values": {col: row[col] for col in column_names},
-                    "records": []
-                }
-            
-            # Add record to group
-            record = {col: row[col] for col in row}
-            duplicate_groups[group_key]["records"].append(record)
-        
-        # Format results
-        groups_list = list(duplicate_groups.values( AS FLOAT))
+        # Rows arrive ordered by the group id SQL assigned to each key
+        groups_list = []
+        for _, rows in groupby(duplicates_result, key=itemgetter('__group_id')):
+            records = []
+            for row in rows:
+                del row['__group_id']
+                records.append(row)
+            groups_list.append({
+                "key_values": {col: records[0][col] for col in column_names},
+                "records": records
+            })
         
         result = {
             "table_name": f"{schema_name}.{table_name_only}",
@@ -5,7 +5,7 @@ from mcp.server.fastmcp import Context
 import logging
 from typing import Dict, List, Any, Optional
 
-from DB_USER.server import server  # Import server to use decorators
+from DB_USER.server import server, get_db_pool  # Import server to use decorators
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +21,7 @@ async def get_table_schema(ctx: Context, table_name: str) -> Dict[str, Any]:
     Returns:
         Dictionary with table schema details including columns, constraints, and indexes
     """
-    db = ctx.lifespan_context.db_pool
+    db = get_db_pool()
     
     # Parse schema and table name
     parts = table_name.split('.')
@@ -124,7 +124,7 @@ async def list_tables(
     Returns:
         List of dictionaries with table information
     """
-    db = ctx.lifespan_context.db_pool
+    db = get_db_pool()
     
     # Build query based on parameters
     query = """
@@ -178,7 +178,7 @@ async def find_foreign_keys(
     Returns:
         Dictionary with incoming and outgoing foreign key relationships
     """
-    db = ctx.lifespan_context.db_pool
+    db = get_db_pool()
     
     # Parse schema and table name
     parts = table_name.split('.')
@@ -11,13 +11,43 @@ import sys
 import os
 import traceback
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 logger = logging.getLogger("DB_USER_ToolsLoader")
 
+# Tool modules imported by register_all_tools
+TOOL_MODULES = (
+    "src.sqlmcp.tools.analyze_fixed",
+    "src.sqlmcp.tools.metadata_fixed",
+    "src.sqlmcp.tools.schema_extended",
+    "src.sqlmcp.tools.simplified_adapter",
+    "src.sqlmcp.tools.basic_advanced",
+    "src.sqlmcp.tools.digest",
+)
+
+def _try_import(module_name: str) -> None:
+    """Import a module, leaving failures for registration to report."""
+    try:
+        importlib.import_module(module_name)
+    except Exception as e:
+        logger.debug(f"Pre-import of {module_name} failed: {e}")
+
+def preimport_tool_modules():
+    """
+    Import all tool modules concurrently.
+    
+    Registration touches the FastMCP registry, which isn't thread-safe, so it
+    stays sequential; this only takes the module loading off that path. A
+    module that fails here is imported again during registration, which logs
+    the real error.
+    """
+    with ThreadPoolExecutor(max_workers=len(TOOL_MODULES), thread_name_prefix="tools-import") as executor:
+        list(executor.map(_try_import, TOOL_MODULES))
+
 def register_all_tools(mcp: Any, db_connection=None, db_connection_blocking=None, 
                       execute_query_blocking=None, allowed_schemas=None, 
-                      is_safe_query=None):
+                      is_safe_query=None, acquire_connection_blocking=None):
     """
     Register all available tools with the MCP instance.
     
@@ -28,12 +58,17 @@ def register_all_tools(mcp: Any, db_connection=None, db_connection_blocking=None
         execute_query_blocking: Blocking query execution function
         allowed_schemas: List of allowed schemas
         is_safe_query: Function to validate if a query is safe
+        acquire_connection_blocking: Context manager checking out a pooled connection
     
     Returns:
         True if all tools were registered successfully, False otherwise
     """
     success = True
     
+    # Load modules in parallel first; registration below then finds them
+    # already in sys.modules
+    preimport_tool_modules()
+    
     # Core tools are registered directly in the server file
     
     # Register additional tools
@@ -45,6 +80,7 @@ def register_all_tools(mcp: Any, db_connection=None, db_connection_blocking=None
             analyze_fixed.mcp = mcp
             analyze_fixed._get_db_connection_blocking = db_connection_blocking
             analyze_fixed._execute_query_blocking = execute_query_blocking
+            analyze_fixed._acquire_connection_blocking = acquire_connection_blocking
             
             # Register tools manually
             mcp.add_tool(analyze_fixed.analyze_table_data)
@@ -247,7 +283,6 @@ def run_digest_initialization():
     This function is called from the main server file.
     """
     try:
-        loop = asyncio.get_event_loop()
-        loop.run_until_complete(initialize_table_field_digest())
+        asyncio.run(initialize_table_field_digest())
     except Exception as e:
         logger.error(f"Failed to run digest initialization: {e}")